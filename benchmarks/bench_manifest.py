@@ -0,0 +1,84 @@
+"""
+Lookups in a local manifest database, checked against a generated
+world content fixture before they are timed.
+"""
+import asyncio
+import os
+import tempfile
+import typing as t
+
+from harness import measure
+from fixtures import envelope, make_manifest_database
+
+from api_methods import *
+from models import *
+
+
+def check_lookups(manifest: ManifestDatabase, hashes: t.List[int]) -> None:
+    """
+    Verifies the hash lookups the timings rely on, raising
+    AssertionError on a wrong answer.
+    """
+    low, high = hashes[0], hashes[-1]
+    assert high >= 1 << 31 and ManifestDatabase.signed_hash(high) < 0
+    assert ManifestDatabase.unsigned_hash(ManifestDatabase.signed_hash(high)) == high
+
+    for hash_id in (low, high, str(high)):
+        definition = manifest.get_definition('DestinyInventoryItemDefinition', hash_id)
+        assert definition is not None and definition['hash'] == int(hash_id), f'Wrong definition for {hash_id!r}'
+    assert manifest.get_definition('DestinyInventoryItemDefinition', 0) is None
+    assert manifest.get_definition('DestinyHistoricalStatsDefinition', 'kills') == {'statId': 'kills'}
+
+    definitions = manifest.get_definitions('DestinyInventoryItemDefinition', [low, high, high, 0])
+    assert sorted(definitions) == sorted([low, high])
+    assert all(definition['hash'] == key for key, definition in definitions.items())
+
+    try:
+        manifest.get_definition('DestinyMissingDefinition', low)
+    except KeyError:
+        pass
+    else:
+        raise AssertionError('A missing table must raise KeyError')
+
+
+async def check_fallback(manifest: ManifestDatabase, directory: str, hash_id: int) -> None:
+    """
+    Verifies :func:`get_entity_manifest` reads the database first and
+    falls back to the API for hashes and tables it does not contain.
+    """
+    store = ReplayStore(directory, bundled=False)
+    for entity_type, missing in (('DestinyInventoryItemDefinition', '0'), ('DestinyMissingDefinition', '1')):
+        store.save(url_builder('d2', 'Manifest', entity_type, missing), envelope({'hash': int(missing), 'api': True}))
+
+    async with ApiClient(replay=store) as client:
+        local = await get_entity_manifest('DestinyInventoryItemDefinition', str(hash_id), client=client, manifest=manifest)
+        assert local.response['hash'] == hash_id and 'api' not in local.response
+        for entity_type, missing in (('DestinyInventoryItemDefinition', '0'), ('DestinyMissingDefinition', '1')):
+            remote = await get_entity_manifest(entity_type, missing, client=client, manifest=manifest)
+            assert remote is not None and remote.response['api'], f'No API fallback for {entity_type}'
+
+
+def run(quick: bool = False) -> t.List[t.Dict]:
+    repeat = 5 if quick else 20
+    results = []
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'world_content.sqlite3')
+        hashes = make_manifest_database(path, definitions=2000 if quick else 20000)
+
+        with ManifestDatabase(path) as manifest:
+            check_lookups(manifest, hashes)
+            asyncio.run(check_fallback(manifest, os.path.join(directory, 'recordings'), hashes[-1]))
+
+            sample = hashes[::len(hashes) // 1000]
+            results.append(measure(
+                'manifest.get_definition.1000',
+                lambda: [manifest.get_definition('DestinyInventoryItemDefinition', h) for h in sample],
+                repeat=repeat, items=len(sample)
+            ))
+            results.append(measure(
+                'manifest.get_definitions.1000',
+                lambda: manifest.get_definitions('DestinyInventoryItemDefinition', sample),
+                repeat=repeat, items=len(sample)
+            ))
+    return results
@@ -0,0 +1,50 @@
+"""
+Memory held by item lists as pydantic models compared to
+:class:`~.models.CompactItems`.
+"""
+import gc
+import tracemalloc
+import typing as t
+
+from fixtures import make_profile
+
+from models import *
+from models import CompactItems
+
+
+def allocated(build: t.Callable[[], t.Any]) -> int:
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    kept = build()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    size = sum(stat.size_diff for stat in after.compare_to(before, 'filename'))
+    del kept
+    return size
+
+
+def result(name: str, size: int, items: int) -> t.Dict:
+    return {
+        'name': name,
+        'unit': 'bytes',
+        'samples': 1,
+        'median': size,
+        'per_item': size / items,
+        'items': items,
+    }
+
+
+def run(quick: bool = False) -> t.List[t.Dict]:
+    results = []
+
+    for items in (600, 6000):
+        raw_items = [i for c in make_profile(items)['inventory'] for i in c['inventory']]
+        count = len(raw_items)
+        results.append(result(
+            f'memory.models.{items}', allocated(lambda: [InventoryItem.parse_obj(i) for i in raw_items]), count
+        ))
+        results.append(result(
+            f'memory.compact.{items}', allocated(lambda: CompactItems.from_raw(raw_items)), count
+        ))
+    return results
@@ -0,0 +1,68 @@
+"""
+Cost of parsing responses and validating them into models.
+"""
+import os
+import tempfile
+import typing as t
+
+from harness import measure
+from fixtures import envelope, make_memberships, make_profile
+
+import json
+
+from api_methods.get import response_handler
+from api_methods.planner import plan_profile_request
+from api_methods.streaming import JsonRecordScanner
+from models import *
+
+
+def lazy_items(profile: LazyModel) -> int:
+    return sum(len(c.inventory or []) for c in profile.inventory) + sum(len(c.equipment or []) for c in profile.equipment)
+
+
+def run(quick: bool = False) -> t.List[t.Dict]:
+    repeat = 5 if quick else 20
+    results = []
+
+    memberships = envelope(make_memberships(profiles=3))
+    results.append(measure(
+        'response_handler.memberships', lambda: response_handler(memberships, PlatformMembership), repeat=repeat * 10
+    ))
+
+    partial = plan_profile_request(['profileInventory', 'inventory', 'equipment']).model
+    for items in (200, 600, 1500):
+        profile = envelope(make_profile(items))
+        results.append(measure(
+            f'response_handler.profile.{items}', lambda: response_handler(profile, D2Profile), repeat=repeat, items=items
+        ))
+        # The character inventories and equipment hold every item of the
+        # fixture, the vault only what is left over, often a single item
+        results.append(measure(
+            f'response_handler.profile.lazy.inventory_equipment.{items}',
+            lambda: lazy_items(response_handler(profile, D2Profile, lazy=True)), repeat=repeat, items=items
+        ))
+        results.append(measure(
+            f'parse_obj.profile.{items}', lambda: D2Profile.parse_obj(profile['Response']), repeat=repeat, items=items
+        ))
+        results.append(measure(
+            f'parse_obj.partial_profile.{items}', lambda: partial.parse_obj(profile['Response']),
+            repeat=repeat, items=items
+        ))
+
+    body = json.dumps(envelope(make_profile(600))).encode()
+    chunk_size = 1 << 16
+    chunks = [body[i:i + chunk_size] for i in range(0, len(body), chunk_size)]
+
+    def scan() -> None:
+        scanner = JsonRecordScanner()
+        for chunk in chunks:
+            scanner.feed(chunk)
+
+    results.append(measure('stream_scanner.profile.600', scan, repeat=repeat, items=600))
+
+    model = D2Profile.parse_obj(make_profile(600))
+    with tempfile.TemporaryDirectory() as directory:
+        file_name = os.path.join(directory, 'profile.json')
+        results.append(measure('to_file.profile.600', lambda: model.to_file(file_name), repeat=repeat, items=600))
+        results[-1]['bytes'] = os.path.getsize(file_name)
+    return results
@@ -0,0 +1,69 @@
+"""
+Throughput and latency of `get_request` against a local stub server
+serving recorded fixtures.
+"""
+import asyncio
+import tempfile
+import typing as t
+from time import perf_counter
+
+from harness import summarize
+from fixtures import envelope, make_memberships, make_profile
+
+from api_methods import *
+from api_methods.get import get_request
+from models import *
+
+
+STUB_PORT = 8931
+
+
+def record_fixtures(store: ReplayStore, items: int) -> t.Dict[str, str]:
+    memberships_url = url_builder('d2', '254/Profile/4611686018400000001/LinkedProfiles/?getAllMemberships=true')
+    profile_url = url_builder('d2', '3', 'Profile', '4611686018400000001', '?components=102,200,201,205')
+    store.save(memberships_url, envelope(make_memberships()))
+    store.save(profile_url, envelope(make_profile(items)))
+    return {'memberships': memberships_url, 'profile': profile_url}
+
+
+async def run_requests(concurrency: int, total: int, url: str, target, client: ApiClient) -> t.List[float]:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one() -> None:
+        async with semaphore:
+            start = perf_counter()
+            await get_request(url, target, client=client)
+            latencies.append(perf_counter() - start)
+
+    await asyncio.gather(*[one() for _ in range(total)])
+    return latencies
+
+
+async def run_async(quick: bool) -> t.List[t.Dict]:
+    results = []
+    total = 50 if quick else 400
+
+    with tempfile.TemporaryDirectory() as directory:
+        urls = record_fixtures(ReplayStore(directory, bundled=False), items=600)
+        runner = await serve_recordings(directory, port=STUB_PORT)
+        limiter = RateLimiter(rate=1e9)
+
+        try:
+            async with ApiClient(base_url=f'http://127.0.0.1:{STUB_PORT}', rate_limiter=limiter, limit_per_host=64) as client:
+                for endpoint, target in (('memberships', PlatformMembership), ('profile', D2Profile)):
+                    for concurrency in (1, 8, 32):
+                        start = perf_counter()
+                        latencies = await run_requests(concurrency, total, urls[endpoint], target, client)
+                        elapsed = perf_counter() - start
+                        results.append(summarize(
+                            f'get_request.{endpoint}.c{concurrency}', latencies,
+                            throughput=total / elapsed, concurrency=concurrency
+                        ))
+        finally:
+            await runner.cleanup()
+    return results
+
+
+def run(quick: bool = False) -> t.List[t.Dict]:
+    return asyncio.run(run_async(quick))
@@ -0,0 +1,80 @@
+"""
+Wall-clock time of one-shot CLI invocations, and the share of it spent
+importing modules as reported by `python -X importtime`.
+
+    python benchmarks/bench_startup.py --settings --offline
+"""
+import re
+import subprocess
+import sys
+import typing as t
+from collections import Counter
+from time import perf_counter
+
+from harness import PACKAGE, summarize
+
+
+COMMANDS = {
+    'help': ['--help'],
+    'settings_offline': ['--settings', '--offline'],
+}
+
+IMPORT_TIME = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+
+def import_times(arguments: t.List[str]) -> t.Tuple[float, t.Counter[str]]:
+    """
+    Runs the CLI once under `-X importtime`.
+
+    :return: Seconds spent importing in total and the cumulative
+        seconds of each top-level package.
+    :rtype: tuple
+
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '__main__.py', *arguments], cwd=PACKAGE, check=True,
+        stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True
+    )
+
+    total, packages = 0.0, Counter()
+    for line in result.stderr.splitlines():
+        if (match := IMPORT_TIME.match(line)) is None:
+            continue
+        self_us, cumulative_us, indent, module = match.groups()
+        total += int(self_us) / 1e6
+        if len(indent) == 1:
+            packages[module.split('.')[0]] += int(cumulative_us) / 1e6
+    return total, packages
+
+
+def run(quick: bool = False) -> t.List[t.Dict]:
+    repeat = 3 if quick else 10
+    results = []
+
+    for name, arguments in COMMANDS.items():
+        samples = []
+        for _ in range(repeat):
+            start = perf_counter()
+            subprocess.run(
+                [sys.executable, '__main__.py', *arguments], cwd=PACKAGE, check=True,
+                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+            )
+            samples.append(perf_counter() - start)
+        results.append(summarize(f'cli.{name}', samples))
+
+        totals, packages = [], Counter()
+        for _ in range(repeat):
+            total, sample_packages = import_times(arguments)
+            totals.append(total)
+            packages.update(sample_packages)
+        slowest = {package: seconds / repeat for package, seconds in packages.most_common(10)}
+        results.append(summarize(f'importtime.{name}', totals, slowest=slowest))
+    return results
+
+
+if __name__ == '__main__':
+    total, packages = import_times(sys.argv[1:])
+    print(f'{"package":<32} {"cumulative":>10}')
+    for package, seconds in packages.most_common(15):
+        print(f'{package:<32} {seconds:>10.3f}')
+    print(f'{"total":<32} {total:>10.3f}')
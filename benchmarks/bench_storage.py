@@ -0,0 +1,47 @@
+"""
+Size and round-trip speed of the file formats of
+:meth:`~.models.AdvancedModel.to_file` against plain JSON.
+"""
+import os
+import tempfile
+import typing as t
+
+from harness import measure
+from fixtures import make_profile
+
+from models import *
+
+
+FORMATS = ('.json', '.json.gz', '.json.zst', '.msgpack', '.msgpack.gz', '.msgpack.zst')
+
+
+def available(suffix: str) -> bool:
+    try:
+        dumps({}, f'probe{suffix}')
+    except ImportError:
+        return False
+    return True
+
+
+def run(quick: bool = False) -> t.List[t.Dict]:
+    repeat = 5 if quick else 20
+    results = []
+
+    for items in (600, 1500):
+        model = D2Profile.parse_obj(make_profile(items))
+        with tempfile.TemporaryDirectory() as directory:
+            for suffix in FORMATS:
+                if not available(suffix):
+                    continue
+                file_name = os.path.join(directory, f'profile{suffix}')
+                write = measure(
+                    f'storage.write{suffix}.{items}', lambda: model.to_file(file_name), repeat=repeat, items=items
+                )
+                size = os.path.getsize(file_name)
+                write['bytes'] = size
+                read = measure(
+                    f'storage.read{suffix}.{items}', lambda: D2Profile.from_file(file_name), repeat=repeat, items=items
+                )
+                read['bytes'] = size
+                results.extend([write, read])
+    return results
@@ -0,0 +1,29 @@
+"""
+Compares the median of every benchmark between two result files.
+
+    python benchmarks/compare.py baseline.json results.json
+"""
+import json
+from argparse import ArgumentParser
+
+
+def load(path: str) -> dict:
+    with open(path) as f:
+        return {r['name']: r for r in json.load(f)['results']}
+
+
+if __name__ == '__main__':
+    parser = ArgumentParser()
+    parser.add_argument('baseline')
+    parser.add_argument('current')
+    parser.add_argument('--threshold', type=float, default=0.1, help='Relative change reported as a regression')
+    args = parser.parse_args()
+
+    baseline, current = load(args.baseline), load(args.current)
+
+    print(f'{"benchmark":<40} {"baseline":>12} {"current":>12} {"change":>8}')
+    for name in sorted(set(baseline) & set(current)):
+        before, after = baseline[name]['median'], current[name]['median']
+        change = (after - before) / before if before else 0.0
+        flag = ' !' if change > args.threshold else ''
+        print(f'{name:<40} {before:>12.6f} {after:>12.6f} {change:>+8.1%}{flag}')
@@ -0,0 +1,168 @@
+"""
+Synthetic, realistically sized API payloads used by the benchmarks.
+"""
+import json
+import random
+import sqlite3
+import typing as t
+from pathlib import Path
+
+
+CHARACTER_IDS = ['2305843009300000001', '2305843009300000002', '2305843009300000003']
+
+
+def envelope(response: t.Any) -> t.Dict:
+    return {
+        'Response': response,
+        'ErrorCode': 1,
+        'ThrottleSeconds': 0,
+        'ErrorStatus': 'Success',
+        'Message': 'Ok',
+    }
+
+
+def make_item(index: int, rng: random.Random) -> t.Dict:
+    return {
+        'bindStatus': 0,
+        'bucketHash': str(rng.choice([138197802, 1469714392, 3313201758, 1498876634, 2465295065])),
+        'dismantlePermission': rng.randint(0, 2),
+        'isWrapper': False,
+        'itemHash': str(rng.randint(1, 2 ** 32 - 1)),
+        'itemInstanceId': str(6917529000000000000 + index),
+        'location': rng.randint(1, 2),
+        'lockable': True,
+        'quantity': rng.randint(1, 3),
+        'state': rng.randint(0, 8),
+        'tooltipNotificationIndexes': [],
+        'transferStatus': 0,
+        'versionNumber': 1,
+    }
+
+
+def make_character(character_id: str, membership_id: str) -> t.Dict:
+    return {
+        'characterId': character_id,
+        'membershipId': membership_id,
+        'membershipType': '3',
+        'light': '1560',
+        'classType': '1',
+        'dateLastPlayed': '2022-05-03T23:00:00Z',
+        'stats': {'1935470627': 1560, '2996146975': 100},
+        'emblemColor': {'alpha': 255, 'blue': 40, 'green': 30, 'red': 20},
+        'levelProgression': {
+            'currentProgress': 0, 'dailyLimit': 0, 'dailyProgress': 0, 'level': 50, 'levelCap': 50,
+            'nextLevelAt': 0, 'progressToNextLevel': 0, 'progressionHash': 1716568313, 'stepIndex': 50,
+            'weeklyLimit': 0, 'weeklyProgress': 0,
+        },
+    }
+
+
+def make_profile(items: int = 600, membership_id: str = '4611686018400000001', seed: int = 0) -> t.Dict:
+    """
+    Builds a `GetProfile` response payload holding `items` inventory
+    items spread over the vault and every character, plus one socket
+    and one reusable plug per item.
+    """
+    rng = random.Random(seed)
+    all_items = [make_item(i, rng) for i in range(items)]
+    per_character = items // (2 * len(CHARACTER_IDS))
+    vault = all_items[per_character * 2 * len(CHARACTER_IDS):] or all_items[:1]
+
+    inventories, equipment = [], []
+    for n, character_id in enumerate(CHARACTER_IDS):
+        start = n * 2 * per_character
+        inventories.append({'characterId': character_id, 'inventory': all_items[start:start + per_character]})
+        equipment.append({
+            'characterId': character_id,
+            'equipment': all_items[start + per_character:start + 2 * per_character]
+        })
+
+    return {
+        'characters': {
+            'data': {c: make_character(c, membership_id) for c in CHARACTER_IDS},
+            'privacy': 1,
+        },
+        'profile': {
+            'data': {
+                'characterIds': CHARACTER_IDS,
+                'currentSeasonHash': '2809059427',
+                'currentSeasonRewardPowerCap': 1580,
+                'dateLastPlayed': '2022-05-03T23:00:00Z',
+                'seasonHashes': [2809059427],
+                'userInfo': {
+                    'applicableMembershipTypes': [3],
+                    'bungieGlobalDisplayName': 'Guardian',
+                    'bungieGlobalDisplayNameCode': 1234,
+                    'crossSaveOverride': 0,
+                    'displayName': 'Guardian',
+                    'isPublic': True,
+                    'membershipId': membership_id,
+                    'membershipType': 3,
+                },
+                'versionsOwned': 31,
+            },
+            'privacy': 1,
+        },
+        'equipment': equipment,
+        'inventory': inventories,
+        'itemComponents': {
+            'instances': [{'itemId': i['itemInstanceId'], 'itemLevel': 1560, 'isEquipped': False} for i in all_items],
+            'reusablePlugs': [
+                {'plugId': str(n), 'canInsert': True, 'enabled': True, 'plugItemHash': i['itemHash']}
+                for n, i in enumerate(all_items)
+            ],
+            'sockets': [
+                {'socketId': str(n), 'isEnabled': True, 'isVisible': True, 'plugHash': i['itemHash']}
+                for n, i in enumerate(all_items)
+            ],
+        },
+        'profileInventory': vault,
+    }
+
+
+def make_memberships(membership_id: str = '4611686018400000001', profiles: int = 3) -> t.Dict:
+    return {
+        'profiles': [
+            {
+                'membershipId': str(int(membership_id) + n),
+                'membershipType': n + 1,
+                'displayName': f'Guardian{n}',
+                'isPublic': True,
+                'crossSaveOverride': 3,
+                'applicableMembershipTypes': [n + 1],
+                'dateLastPlayed': '2022-05-03T23:00:00Z',
+            } for n in range(profiles)
+        ],
+        'bnetMembership': {'membershipId': '12345678', 'membershipType': 254, 'displayName': 'Guardian'},
+        'profilesWithErrors': [],
+    }
+
+
+def make_manifest_database(path: t.Union[str, Path], definitions: int = 2000, seed: int = 0) -> t.List[int]:
+    """
+    Writes a world content database shaped like the real one: a
+    `DestinyInventoryItemDefinition` table keyed by the definition hash
+    stored as a signed 32-bit `id`, half of the hashes at or above
+    `2 ** 31` so their keys are negative, and a
+    `DestinyHistoricalStatsDefinition` table keyed by a text `key`.
+
+    :return: The unsigned hashes of the item definitions.
+    :rtype: list
+
+    """
+    rng = random.Random(seed)
+    hashes = rng.sample(range(1, 1 << 31), definitions // 2) + rng.sample(range(1 << 31, 1 << 32), definitions // 2)
+
+    connection = sqlite3.connect(path)
+    with connection:
+        connection.execute('CREATE TABLE DestinyInventoryItemDefinition (id INTEGER PRIMARY KEY, json BLOB)')
+        connection.executemany('INSERT INTO DestinyInventoryItemDefinition VALUES (?, ?)', [
+            (h - (1 << 32) if h >= (1 << 31) else h, json.dumps({'hash': h, 'displayProperties': {'name': f'Item {h}'}}))
+            for h in hashes
+        ])
+        connection.execute('CREATE TABLE DestinyHistoricalStatsDefinition (key TEXT PRIMARY KEY, json BLOB)')
+        connection.executemany('INSERT INTO DestinyHistoricalStatsDefinition VALUES (?, ?)', [
+            (name, json.dumps({'statId': name})) for name in ('kills', 'deaths', 'assists')
+        ])
+    connection.close()
+    return hashes
@@ -0,0 +1,66 @@
+"""
+Timing helpers shared by the benchmark suites.
+"""
+import statistics
+import sys
+import typing as t
+from pathlib import Path
+from time import perf_counter
+
+
+REPOSITORY = Path(__file__).resolve().parents[1]
+PACKAGE = REPOSITORY.joinpath('src', 'api_explorer')
+
+if str(PACKAGE) not in sys.path:
+    sys.path.insert(0, str(PACKAGE))
+
+
+def summarize(name: str, samples: t.List[float], unit: str = 's', **extra) -> t.Dict:
+    """
+    Reduces raw samples to the summary recorded for one benchmark.
+    """
+    ordered = sorted(samples)
+    return {
+        'name': name,
+        'unit': unit,
+        'samples': len(samples),
+        'min': ordered[0],
+        'median': statistics.median(ordered),
+        'mean': statistics.fmean(ordered),
+        'p95': ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+        'max': ordered[-1],
+        **extra,
+    }
+
+
+def measure(name: str, func: t.Callable[[], t.Any], repeat: int = 20, warmup: int = 2, **extra) -> t.Dict:
+    """
+    Times `repeat` calls of `func` after `warmup` untimed calls.
+    """
+    for _ in range(warmup):
+        func()
+
+    samples = []
+    for _ in range(repeat):
+        start = perf_counter()
+        func()
+        samples.append(perf_counter() - start)
+    return summarize(name, samples, **extra)
+
+
+async def measure_async(
+    name: str,
+    func: t.Callable[[], t.Awaitable[t.Any]],
+    repeat: int = 20,
+    warmup: int = 2,
+    **extra
+    ) -> t.Dict:
+    for _ in range(warmup):
+        await func()
+
+    samples = []
+    for _ in range(repeat):
+        start = perf_counter()
+        await func()
+        samples.append(perf_counter() - start)
+    return summarize(name, samples, **extra)
@@ -0,0 +1,63 @@
+"""
+Runs the benchmark suites and writes their results as JSON.
+
+    python benchmarks/run.py --output results.json
+    python benchmarks/compare.py baseline.json results.json
+"""
+import json
+import platform
+import subprocess
+import sys
+from argparse import ArgumentParser
+from datetime import datetime, timezone
+
+from harness import REPOSITORY
+
+import bench_manifest
+import bench_memory
+import bench_models
+import bench_requests
+import bench_startup
+import bench_storage
+
+
+SUITES = {
+    'manifest': bench_manifest,
+    'memory': bench_memory,
+    'models': bench_models,
+    'requests': bench_requests,
+    'startup': bench_startup,
+    'storage': bench_storage,
+}
+
+
+def commit() -> str:
+    result = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=REPOSITORY, capture_output=True, text=True)
+    return result.stdout.strip() or 'unknown'
+
+
+if __name__ == '__main__':
+    parser = ArgumentParser()
+    parser.add_argument('--output', type=str, help='File the results are written to, defaults to stdout')
+    parser.add_argument('--quick', action='store_true', help='Fewer repetitions, for smoke runs')
+    parser.add_argument('--suite', choices=list(SUITES), action='append')
+    args = parser.parse_args()
+
+    results = []
+    for name in args.suite or SUITES:
+        print(f'Running {name} benchmarks', file=sys.stderr)
+        results.extend(SUITES[name].run(quick=args.quick))
+
+    report = json.dumps({
+        'commit': commit(),
+        'date': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': results,
+    }, indent=2)
+
+    if args.output is None:
+        print(report)
+    else:
+        with open(args.output, 'w') as f:
+            f.write(report)
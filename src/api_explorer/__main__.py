@@ -5,38 +5,60 @@ import sys
 import typing as t
 from argparse import ArgumentParser, Namespace
 from functools import partial
-from pandas import json_normalize
+from pathlib import Path
+from urllib.parse import quote
+
+if t.TYPE_CHECKING:
+    from aiohttp import web
+    from api_methods import ActivitySummary, HarvestSummary
 
 
 logger = logging.getLogger()
 
-from api_methods import *
+# `api_methods` pulls in aiohttp and pydantic, and pandas is only needed
+# by `flatten`, so both are imported by the commands using them to keep
+# `--help` and argument errors fast.
 
 
 async def handle_args(args: t.Union[Namespace, None]) -> t.Callable:
+    import api_methods as api
+
     if getattr(args, 'member_id') is None:
         match args:
             # Do not require member ID
-            case args if getattr(args, 'manifest') is not None:
-                return await get_d2_manifest()
-            case args if (manifest := getattr(args, 'entity_manifest')) is not None and manifest:
+            case args if getattr(args, 'manifest'):
+                return await api.get_d2_manifest()
+            case args if (manifest := getattr(args, 'entity_manifest', None)) is not None and manifest:
                 if (entity_type := getattr(args, 'entity_type')) is not None:
-                    return await get_entity_manifest(entity_type)
+                    return await api.get_entity_manifest(entity_type)
                 logger.info('No entity type provided, getting default manifest')
-                return await get_d2_manifest()
+                return await api.get_d2_manifest()
             case args if (settings := getattr(args, 'settings')) is not None and settings:
-                return await get_bnet_settings()
+                return await api.get_bnet_settings()
             case args if (stats_definition := getattr(args, 'stats_definition')) is not None and stats_definition:
-                return await get_historical_stats_definition()
+                filters = {
+                    'mode': args.stat_mode, 'period_type': args.stat_period_type,
+                    'group': args.stat_group, 'category': args.stat_category,
+                }
+                if all(value is None for value in filters.values()):
+                    return await api.get_historical_stats_definition()
+                cache_path = Path(args.cache_dir).joinpath('stats_catalog.json.gz') if args.cache_dir else None
+                catalog = await api.load_stats_catalog(cache_path=cache_path)
+                return catalog.filter(**filters)
             case args if (entities := getattr(args, 'entities')) is not None and entities:
                 if (search_term := getattr(args, 'search_term')) is None:
                     logger.error('Search term required to search for entities')
                     return None
-                if (entity_type := getattr(args, 'entity_type')) is not None:
+                if (entity_type := getattr(args, 'entity_type')) is None:
                     logger.error('Entity type required to search for entities')
                     return None
                 page = getattr(args, 'search_page', 0)
-                return await search_destiny_entities(entity_type, search_term, page)
+                return await api.search_destiny_entities(entity_type, search_term, page)
+            case args if (clan_members := getattr(args, 'clan_members')) is not None and clan_members:
+                if (group_id := getattr(args, 'group_id')) is None:
+                    logger.error('Group ID required to list clan members')
+                    return None
+                return await api.get_clan_members(group_id)
 
     if (member_id := args.member_id) is None:
         logger.error('Member ID required for remaining requests')
@@ -45,37 +67,286 @@ async def handle_args(args: t.Union[Namespace, None]) -> t.Callable:
     match args:
         # Require member ID
         case user_data if (user_data := getattr(args, 'user_data')) is not None and user_data:
-            return await get_user_data(member_id)
+            return await api.get_user_data(member_id)
         case user_names if (user_names := getattr(args, 'user_names')) is not None and user_names:
-            return await get_cleaned_user_names(member_id)
+            return await api.get_cleaned_user_names(member_id)
         case memberships if (memberships := getattr(args, 'memberships')) is not None and memberships:
-            return await get_platform_memberships(member_id)
+            return await api.get_platform_memberships(member_id)
         case components if (components := getattr(args, 'components')) is not None and components:
+            if args.fields:
+                return await api.get_profile_fields(member_id, args.fields)
             if not (component_ids := args.component_ids):
                 logger.error('Component ID(s) required to search for components')
                 return None
-            return await get_components(member_id, component_ids)
+            return await api.get_components(member_id, component_ids)
         case inventory if (inventory := getattr(args, 'inventory')) is not None and inventory:
-            return await get_user_inventory(member_id)
+            return await api.get_user_inventory(member_id)
 
 
 def flatten(obj: t.Dict, sep='.'):
+    from pandas import json_normalize
+
     flat_dict = json_normalize(obj, sep=sep).to_dict(orient='records')
     return list(flat_dict)
 
 
+async def stream_entities(args: Namespace) -> None:
+    """
+    Prints every result of an entity search as its page arrives.
+    """
+    import api_methods as api
+
+    if args.search_term is None or args.entity_type is None:
+        logger.error('Search term and entity type required to search for entities')
+        return
+
+    concurrency = args.concurrency or api.SEARCH_CONCURRENCY
+    async for page in api.iter_destiny_entity_pages(args.entity_type, args.search_term, concurrency=concurrency):
+        for entity in (page.response or {}).get('results', {}).get('results') or []:
+            print(entity)
+
+
+async def snapshot_changes(directory: str, profiles: t.List) -> t.List[t.Dict]:
+    """
+    Stores the inventory of every profile in a snapshot store and
+    returns the item changes since the previous run instead.
+    """
+    import api_methods as api
+
+    store = api.SnapshotStore(directory)
+    changes = []
+    for profile in profiles:
+        if profile is not None:
+            changes.extend(change.dict() for change in await store.update(profile))
+    return changes
+
+
+async def harvest(args: Namespace) -> 'HarvestSummary':
+    import api_methods as api
+
+    concurrency = args.concurrency or api.HARVEST_CONCURRENCY
+    input_stream = sys.stdin if args.harvest == '-' else open(args.harvest)
+    output_stream = sys.stdout if args.output is None else open(args.output, 'w')
+
+    try:
+        summary = await api.harvest_inventories(api.iter_member_ids(input_stream), output_stream, concurrency)
+    finally:
+        if input_stream is not sys.stdin:
+            input_stream.close()
+        if output_stream is not sys.stdout:
+            output_stream.close()
+
+    logger.info(f'Harvested {summary.succeeded} inventories, {summary.failed} failed')
+    return summary
+
+
+async def harvest_clan(args: Namespace) -> 'HarvestSummary':
+    import api_methods as api
+
+    concurrency = args.concurrency or api.HARVEST_CONCURRENCY
+    output_stream = sys.stdout if args.output is None else open(args.output, 'w')
+
+    try:
+        summary = await api.harvest_clan_inventories(args.group_id, output_stream, concurrency)
+    finally:
+        if output_stream is not sys.stdout:
+            output_stream.close()
+
+    logger.info(f'Harvested {summary.succeeded} inventories, {summary.failed} failed')
+    return summary
+
+
+async def harvest_activities(args: Namespace) -> 'ActivitySummary':
+    import api_methods as api
+
+    concurrency = args.concurrency or api.PGCR_CONCURRENCY
+    cache = api.DiskCache(Path(args.cache_dir).joinpath('pgcr.sqlite3')) if args.cache_dir is not None else None
+    output_stream = sys.stdout if args.output is None else open(args.output, 'w')
+
+    try:
+        summary = await api.harvest_member_activity_reports(
+            args.member_id, output_stream, args.activity_mode or 0, concurrency, cache=cache
+        )
+    finally:
+        if output_stream is not sys.stdout:
+            output_stream.close()
+        if cache is not None:
+            cache.close()
+
+    logger.info(
+        f'Wrote {summary.reports} reports of {summary.activities} activities, '
+        f'{summary.cached} cached, {summary.failed} failed'
+    )
+    return summary
+
+
+"""
+Flags only the local client handles, rejected with `--daemon-url`
+rather than silently dropped.
+"""
+LOCAL_ONLY_FLAGS = (
+    '--fields', '--stat-mode', '--stat-period-type', '--stat-group', '--stat-category', '--snapshot-dir',
+    '--metrics', '--harvest', '--harvest-clan', '--activities', '--clan-members',
+)
+
+
+def daemon_path(args: Namespace) -> t.Optional[str]:
+    """
+    Path of the request service route answering the same request as
+    :func:`handle_args`.
+    """
+    if args.member_id is None:
+        match args:
+            case args if args.manifest:
+                return '/manifest'
+            case args if args.settings:
+                return '/settings'
+            case args if args.stats_definition:
+                return '/stats-definition'
+            case args if args.entities:
+                if args.search_term is None or args.entity_type is None:
+                    logger.error('Search term and entity type required to search for entities')
+                    return None
+                page = 'all' if args.all_pages else args.search_page or 0
+                return f'/entities/{quote(args.entity_type, safe="")}/{quote(args.search_term, safe="")}?page={page}'
+
+    if (member_id := args.member_id) is None:
+        logger.error('Member ID required for remaining requests')
+        return None
+
+    match args:
+        case args if args.user_data:
+            return f'/users/{quote(member_id, safe="")}'
+        case args if args.user_names:
+            return f'/users/{quote(member_id, safe="")}/names'
+        case args if args.memberships:
+            return f'/users/{quote(member_id, safe="")}/memberships'
+        case args if args.components:
+            if not args.component_ids:
+                logger.error('Component ID(s) required to search for components')
+                return None
+            return f'/users/{quote(member_id, safe="")}/components?components={",".join(map(str, args.component_ids))}'
+        case args if args.inventory:
+            return f'/users/{quote(member_id, safe="")}/inventory'
+
+
+async def request_daemon(args: Namespace) -> t.Any:
+    """
+    Sends the request to a running request service instead of the API,
+    so the CLI neither imports the request modules nor opens a
+    connection pool of its own. `--daemon-url` is either an
+    `http://host:port` url or `unix:<socket path>`.
+    """
+    import aiohttp
+
+    if unsupported := [flag for flag in LOCAL_ONLY_FLAGS if getattr(args, flag[2:].replace('-', '_')) not in (None, False)]:
+        logger.error(f'{", ".join(unsupported)} can not be sent to the request service, run without --daemon-url')
+        return None
+    if (path := daemon_path(args)) is None:
+        return None
+
+    if args.daemon_url.startswith('unix:'):
+        connector, base_url = aiohttp.UnixConnector(path=args.daemon_url[len('unix:'):]), 'http://localhost'
+    else:
+        connector, base_url = None, args.daemon_url.rstrip('/')
+
+    async with aiohttp.ClientSession(connector=connector) as session:
+        async with session.get(f'{base_url}{path}') as r:
+            if r.content_type != 'application/json':
+                logger.error(f'Request service answered {r.status}: {(await r.text()).strip()[:200]}')
+                return None
+            body = await r.json()
+            if r.status != 200:
+                logger.error(f'Request service answered {r.status}: {body.get("Message")}')
+                return None
+            return body
+
+
+async def serve_forever(runner: 'web.AppRunner') -> t.NoReturn:
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
+
+
 async def main(args: Namespace):
-    response = await handle_args(args)
+    if args.daemon_url is not None:
+        response = await request_daemon(args)
+        print_response(response)
+        return
+
+    import api_methods as api
+
+    client_options = {}
+    if args.rate_limit is not None:
+        client_options['rate_limiter'] = api.RateLimiter(rate=args.rate_limit)
+    if args.cache_dir is not None:
+        client_options['cache'] = api.ResponseCache(disk=api.DiskCache(Path(args.cache_dir).joinpath('responses.sqlite3')))
+    if args.offline is not None:
+        client_options['replay'] = api.ReplayStore(args.offline or api.RESOURCES)
+    if args.record is not None:
+        client_options['record'] = api.ReplayStore(args.record, bundled=False)
+    if args.serve and 'cache' not in client_options:
+        client_options['cache'] = api.ResponseCache()
+    if args.metrics or args.serve:
+        client_options['metrics'] = api.Metrics()
+    if client_options:
+        api.set_default_client(api.ApiClient(**client_options))
+
+    try:
+        if args.serve_recordings is not None:
+            await serve_forever(await api.serve_recordings(args.serve_recordings, port=args.port or 8080))
+            return
+        if args.serve:
+            manifest = api.ManifestDatabase(args.manifest_path) if args.manifest_path is not None else None
+            try:
+                await serve_forever(await api.serve_service(
+                    args.host, args.port or api.SERVICE_PORT, args.socket, manifest=manifest
+                ))
+            finally:
+                if manifest is not None:
+                    manifest.close()
+            return
+        if args.harvest is not None:
+            await harvest(args)
+            return
+        if args.harvest_clan:
+            if args.group_id is None:
+                logger.error('Group ID required to harvest a clan')
+                return
+            await harvest_clan(args)
+            return
+        if args.activities:
+            if args.member_id is None:
+                logger.error('Member ID required to fetch activity reports')
+                return
+            await harvest_activities(args)
+            return
+        if args.entities and args.all_pages and args.member_id is None:
+            await stream_entities(args)
+            return
+        response = await handle_args(args)
+        if args.snapshot_dir is not None and args.inventory and response:
+            response = await snapshot_changes(args.snapshot_dir, response)
+    finally:
+        if args.metrics:
+            print(api.get_default_client().metrics.summary(), file=sys.stderr)
+        await api.close_default_client()
 
+    print_response(response)
+
+
+def print_response(response: t.Any) -> None:
     match response:
+        case None:
+            return
         case dict():
             print(response)
         case list():
             for i in response:
-                print(i)
+                print(i.dict() if hasattr(i, 'dict') else i)
         case _:
             print(response.dict())
-    
 
 
 if __name__ == '__main__':
@@ -85,8 +356,33 @@ if __name__ == '__main__':
     parser.add_argument('--entity-type', type=str)
     parser.add_argument('--search-term', type=str)
     parser.add_argument('--search-page', type=int)
+    parser.add_argument('--all-pages', action='store_true', help='Stream the results of every search page')
     parser.add_argument('--component-ids', type=int, nargs='+')
+    parser.add_argument('--fields', type=str, nargs='+',
+                        help='D2Profile fields to fetch with --components, only their components are requested')
     parser.add_argument('--member-id', type=str)
+    parser.add_argument('--group-id', type=str, help='Group ID of a clan')
+    parser.add_argument('--stat-mode', type=int, help='With --stats-definition, only stats of this activity mode')
+    parser.add_argument('--stat-period-type', type=int)
+    parser.add_argument('--stat-group', type=int)
+    parser.add_argument('--stat-category', type=int)
+    parser.add_argument('--activity-mode', type=int, help='With --activities, only activities of this mode')
+    parser.add_argument('--concurrency', type=int)
+    parser.add_argument('--output', type=str)
+    parser.add_argument('--snapshot-dir', type=str,
+                        help='With --inventory, store snapshots and print the item changes since the last run')
+    parser.add_argument('--metrics', action='store_true', help='Print a summary of the requests made to stderr')
+    parser.add_argument('--rate-limit', type=float, metavar='REQUESTS_PER_SECOND')
+    parser.add_argument('--cache-dir', type=str, help='Directory of a persistent response cache')
+    parser.add_argument('--offline', type=str, nargs='?', const='', metavar='RECORDINGS_DIR',
+                        help='Serve requests from recorded responses, defaults to the bundled resources')
+    parser.add_argument('--record', type=str, metavar='RECORDINGS_DIR', help='Record live responses')
+    parser.add_argument('--port', type=int)
+    parser.add_argument('--host', type=str, default='127.0.0.1')
+    parser.add_argument('--socket', type=str, metavar='SOCKET_PATH', help='Serve requests on a Unix socket')
+    parser.add_argument('--manifest-path', type=str, help='Manifest database the request service keeps open')
+    parser.add_argument('--daemon-url', type=str, metavar='URL',
+                        help="Send the request to a running request service, 'http://host:port' or 'unix:<path>'")
 
     # Action trigger switches
     parser.add_argument('--user-data', action='store_true')
@@ -98,6 +394,17 @@ if __name__ == '__main__':
     parser.add_argument('--settings', action='store_true')
     parser.add_argument('--stats-definition', action='store_true')
     parser.add_argument('--components', action='store_true')
+    parser.add_argument('--serve-recordings', type=str, metavar='RECORDINGS_DIR',
+                        help='Run a local HTTP stub server for recorded responses')
+    parser.add_argument('--serve', action='store_true',
+                        help='Run a long-lived HTTP service answering requests with a warm client')
+    parser.add_argument('--harvest', type=str, metavar='MEMBER_ID_FILE',
+                        help="Fetch the inventory of every member ID in a file ('-' for stdin) as JSON lines")
+    parser.add_argument('--clan-members', action='store_true', help='List the members of the clan --group-id')
+    parser.add_argument('--harvest-clan', action='store_true',
+                        help='Fetch the inventory of every member of --group-id as JSON lines')
+    parser.add_argument('--activities', action='store_true',
+                        help='Fetch the post game carnage report of every activity of a member as JSON lines')
     # parser.add_argument('--vendor-info', action='store_true')
     
     args = parser.parse_args()
@@ -1,3 +1,32 @@
+from .activities import *
+from .bulk import *
+from .cache import *
+from .coalesce import *
+from .clans import *
+from .client import *
 from .common import *
 from .factory import *
-from .get import *
\ No newline at end of file
+from .get import *
+from .manifest import *
+from .memberships import *
+from .metrics import *
+from .planner import *
+from .replay import *
+from .service import *
+from .snapshots import *
+from .stats import *
+from .streaming import *
+from .throttle import *
+
+from models.generic import lazy_attributes
+
+
+# Submodules with heavy dependencies, imported on first access
+_LAZY_NAMES = {
+    'items_frame': 'enrichment',
+    'item_definitions_frame': 'enrichment',
+    'bucket_definitions_frame': 'enrichment',
+    'enrich_inventory': 'enrichment',
+}
+
+__getattr__ = lazy_attributes(__name__, _LAZY_NAMES)
@@ -0,0 +1,247 @@
+import asyncio
+import json
+import logging
+import math
+import typing as t
+from urllib.parse import urlencode
+
+from models import *
+from .bulk import run_bounded
+from .cache import DiskCache
+from .client import ApiClient
+from .common import *
+from .factory import url_builder
+from .get import get_platform_memberships, get_request
+from .planner import get_profile_fields
+
+
+logger = logging.getLogger()
+
+
+__all__ = ('ActivitySummary', 'CharacterRef', 'ACTIVITY_PAGE_SIZE', 'get_activity_history_page',
+           'iter_activity_history', 'get_pgcr', 'harvest_activity_reports', 'member_characters',
+           'harvest_member_activity_reports')
+
+
+"""
+Activities requested per page of a character's activity history,
+the maximum the API allows.
+"""
+ACTIVITY_PAGE_SIZE = 250
+
+
+class CharacterRef(t.NamedTuple):
+    """
+    What the activity endpoints need to address one character.
+    """
+    membership_type: int
+    membership_id: str
+    character_id: str
+
+
+class ActivitySummary(t.NamedTuple):
+    activities: int
+    reports: int
+    cached: int
+    duplicates: int
+    failed: int
+
+
+async def get_activity_history_page(
+    character: CharacterRef,
+    page: int,
+    mode: int = 0,
+    count: int = ACTIVITY_PAGE_SIZE,
+    client: t.Optional[ApiClient] = None
+    ) -> t.Optional[t.List[t.Dict]]:
+    """
+    Returns one page of the activity history of a character, most
+    recent first, or None if the request failed.
+    """
+    query = urlencode({'mode': mode, 'count': count, 'page': page})
+    history_url = url_builder(
+        'd2', str(character.membership_type), 'Account', character.membership_id,
+        'Character', character.character_id, 'Stats', 'Activities', f'?{query}'
+    )
+    history: GenericApiResponse = await get_request(history_url, client=client)
+    if history is None or history.error_code != 1:
+        return None
+    return (history.response or {}).get('activities') or []
+
+
+async def iter_activity_history(
+    character: CharacterRef,
+    mode: int = 0,
+    client: t.Optional[ApiClient] = None,
+    concurrency: int = ACTIVITY_PAGE_CONCURRENCY
+    ) -> t.AsyncIterator[t.Dict]:
+    """
+    Yields every activity of a character's history, most recent first.
+
+    The endpoint does not report how many pages there are, so pages
+    are requested `concurrency` at a time until one comes back short.
+    At most `concurrency - 1` pages past the end are requested.
+    """
+    page = 0
+    while True:
+        pages = await asyncio.gather(*[
+            get_activity_history_page(character, p, mode, client=client) for p in range(page, page + concurrency)
+        ])
+        for activities in pages:
+            if activities is None:
+                logger.error(f'Could not retrieve the activity history of character {character.character_id}')
+                return
+            for activity in activities:
+                yield activity
+            if len(activities) < ACTIVITY_PAGE_SIZE:
+                return
+        page += concurrency
+
+
+def _pgcr_key(activity_id: str) -> str:
+    # Keyed apart from the urls of a shared response cache file
+    return f'pgcr:{activity_id}'
+
+
+async def _fetch_pgcr(
+    activity_id: str,
+    client: t.Optional[ApiClient] = None,
+    cache: t.Optional[DiskCache] = None
+    ) -> t.Tuple[t.Optional[t.Dict], bool]:
+    # Returns the report and whether it was found in the cache
+    if cache is not None and (row := await cache.get(_pgcr_key(activity_id))) is not None:
+        return row[1], True
+
+    report: GenericApiResponse = await get_request(url_builder('pgcr', str(activity_id), ''), client=client)
+    if report is None or report.error_code != 1 or not report.response:
+        return None, False
+    if cache is not None:
+        await cache.set(_pgcr_key(activity_id), math.inf, report.response)
+    return report.response, False
+
+
+async def get_pgcr(
+    activity_id: str,
+    client: t.Optional[ApiClient] = None,
+    cache: t.Optional[DiskCache] = None
+    ) -> t.Optional[t.Dict]:
+    """
+    Returns the post game carnage report of an activity, or None if it
+    could not be retrieved. Reports never change once the activity is
+    over, so they are kept in `cache` forever by activity ID and a
+    report found there is returned without a request.
+    """
+    report, _ = await _fetch_pgcr(activity_id, client=client, cache=cache)
+    return report
+
+
+async def harvest_activity_reports(
+    characters: t.Iterable[CharacterRef],
+    output: t.TextIO,
+    mode: int = 0,
+    concurrency: int = PGCR_CONCURRENCY,
+    client: t.Optional[ApiClient] = None,
+    cache: t.Optional[DiskCache] = None
+    ) -> ActivitySummary:
+    """
+    Pages through the activity history of every character and writes
+    the post game carnage report of each activity to `output` as one
+    JSON line, `{'activity_id', 'character_id', 'activity', 'pgcr'}`,
+    as soon as it is retrieved.
+
+    The histories of the characters are paged concurrently while
+    `concurrency` workers fetch the reports through a bounded queue,
+    see :func:`~.bulk.run_bounded`. An activity shared by several
+    characters is fetched and written once. Reports found in `cache`
+    are not requested again. A report that can not be fetched is
+    counted as failed, an error paging a history or writing `output`
+    cancels the batch and is raised.
+
+    :param characters: Characters whose history is harvested.
+    :param output: Text stream the newline-delimited JSON is written to.
+    :type output: TextIO
+    :param mode: Activity mode the history is filtered on, 0 for all.
+    :type mode: int
+    :return: Counts of activities, reports written, reports served
+        from the cache, duplicate activities and failed reports.
+    :rtype: :class:`ActivitySummary`
+
+    """
+    seen: t.Set[str] = set()
+    activities = reports = cached = duplicates = failed = 0
+
+    async def fetch_report(queued: t.Tuple[str, t.Dict]) -> None:
+        nonlocal reports, cached, failed
+        character_id, activity = queued
+        activity_id = activity['activityDetails']['instanceId']
+        try:
+            report, from_cache = await _fetch_pgcr(activity_id, client=client, cache=cache)
+            if report is None:
+                raise LookupError('No report could be retrieved')
+            cached += from_cache
+        except Exception as e:
+            logger.error(f'Failed to fetch the report of activity {activity_id}: {e!r}')
+            failed += 1
+            return
+        record = {'activity_id': activity_id, 'character_id': character_id, 'activity': activity, 'pgcr': report}
+        output.write(json.dumps(record) + '\n')
+        reports += 1
+
+    def page_character(character: CharacterRef) -> t.Callable[[t.Callable], t.Awaitable[None]]:
+        async def produce(put: t.Callable[[t.Tuple[str, t.Dict]], t.Awaitable[None]]) -> None:
+            nonlocal activities, duplicates
+            async for activity in iter_activity_history(character, mode, client=client):
+                activities += 1
+                activity_id = activity['activityDetails']['instanceId']
+                if activity_id in seen:
+                    duplicates += 1
+                    continue
+                seen.add(activity_id)
+                await put((character.character_id, activity))
+        return produce
+
+    await run_bounded([page_character(c) for c in characters], fetch_report, concurrency)
+    output.flush()
+
+    return ActivitySummary(activities, reports, cached, duplicates, failed)
+
+
+async def member_characters(
+    member_id: str,
+    client: t.Optional[ApiClient] = None,
+    memberships: t.Optional[PlatformMembership] = None
+    ) -> t.List[CharacterRef]:
+    """
+    Lists the characters of every profile of a member from the
+    `characters` of their :class:`~.models.D2Profile`, requesting only
+    the characters component.
+    """
+    if memberships is None:
+        memberships = await get_platform_memberships(member_id, client=client)
+    if not memberships or not memberships.profiles:
+        logger.error('Could not get user profile information')
+        return []
+
+    profiles = await get_profile_fields(member_id, ['characters'], client=client, memberships=memberships)
+    return [
+        CharacterRef(membership.membership_type, membership.membership_id, character_id)
+        for membership, profile in zip(memberships.profiles, profiles)
+        if profile is not None and profile.characters is not None
+        for character_id in profile.characters.data
+    ]
+
+
+async def harvest_member_activity_reports(
+    member_id: str,
+    output: t.TextIO,
+    mode: int = 0,
+    concurrency: int = PGCR_CONCURRENCY,
+    client: t.Optional[ApiClient] = None,
+    cache: t.Optional[DiskCache] = None,
+    memberships: t.Optional[PlatformMembership] = None
+    ) -> ActivitySummary:
+    """
+    :func:`harvest_activity_reports` for every character of a member.
+    """
+    characters = await member_characters(member_id, client=client, memberships=memberships)
+    return await harvest_activity_reports(characters, output, mode, concurrency, client=client, cache=cache)
@@ -0,0 +1,155 @@
+import asyncio
+import json
+import logging
+import typing as t
+from pydantic.json import pydantic_encoder
+
+from models import *
+from .client import ApiClient
+from .common import *
+from .get import get_user_inventory
+
+
+logger = logging.getLogger()
+
+
+__all__ = ('HarvestSummary', 'iter_member_ids', 'run_bounded', 'harvest_inventories')
+
+
+Item = t.TypeVar('Item')
+
+# Marks the end of the queue of run_bounded, so None can be an item
+_DONE = object()
+
+
+class HarvestSummary(t.NamedTuple):
+    succeeded: int
+    failed: int
+
+
+async def iter_member_ids(stream: t.TextIO) -> t.AsyncIterator[str]:
+    """
+    Lazily yields member IDs from a text stream, one per line. Blank
+    lines and lines starting with `#` are skipped. Lines are read in a
+    worker thread so a slow stream such as stdin never blocks the
+    event loop.
+    """
+    while line := await asyncio.to_thread(stream.readline):
+        member_id = line.strip()
+        if member_id and not member_id.startswith('#'):
+            yield member_id
+
+
+async def _iterate(member_ids: t.Union[t.Iterable[str], t.AsyncIterable[str]]) -> t.AsyncIterator[str]:
+    if isinstance(member_ids, t.AsyncIterable):
+        async for member_id in member_ids:
+            yield member_id
+    else:
+        for member_id in member_ids:
+            yield member_id
+
+
+async def run_bounded(
+    producers: t.Iterable[t.Callable[[t.Callable[[Item], t.Awaitable[None]]], t.Awaitable[None]]],
+    consume: t.Callable[[Item], t.Awaitable[None]],
+    concurrency: int
+    ) -> None:
+    """
+    Runs every producer with a `put` coroutine function and consumes
+    the items they put with `concurrency` workers. The queue between
+    them holds at most `2 * concurrency` items, so producers wait
+    whenever the workers fall behind.
+
+    Producers and workers run as one batch. If any of them raises, the
+    others are cancelled and the exception is raised, so a failing
+    worker can never leave producers blocked on a full queue.
+
+    :param producers: Coroutine functions putting items through the
+        `put` they are called with.
+    :param consume: Coroutine function handling one item.
+    :param concurrency: Number of items consumed at once.
+    :type concurrency: int
+
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=concurrency * 2)
+
+    async def worker() -> None:
+        while (item := await queue.get()) is not _DONE:
+            await consume(item)
+
+    producer_tasks = [asyncio.create_task(produce(queue.put)) for produce in producers]
+
+    async def close() -> None:
+        await asyncio.gather(*producer_tasks)
+        for _ in range(concurrency):
+            await queue.put(_DONE)
+
+    tasks = [*producer_tasks, asyncio.create_task(close()), *[asyncio.create_task(worker()) for _ in range(concurrency)]]
+    try:
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+        for task in tasks:
+            if task.done() and not task.cancelled() and (error := task.exception()) is not None:
+                raise error
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def harvest_inventories(
+    member_ids: t.Union[t.Iterable[str], t.AsyncIterable[str]],
+    output: t.TextIO,
+    concurrency: int = HARVEST_CONCURRENCY,
+    client: t.Optional[ApiClient] = None,
+    memberships: t.Optional[t.Mapping[str, PlatformMembership]] = None
+    ) -> HarvestSummary:
+    """
+    Fetches the inventory of every member in `member_ids` and writes
+    one JSON line per member to `output` as soon as it is retrieved.
+
+    Member IDs are consumed lazily through a bounded queue, see
+    :func:`run_bounded`, so only `concurrency` inventories are held in
+    memory at any time regardless of how long the input is. A member
+    whose inventory can not be fetched is written as an `error` record
+    and does not abort the batch, a failure to write `output` does.
+
+    :param member_ids: Iterable or async iterable of member IDs.
+    :param output: Text stream the newline-delimited JSON is written to.
+    :type output: TextIO
+    :param concurrency: Number of members fetched at once.
+    :type concurrency: int
+    :param memberships: Already resolved memberships by member ID,
+        members found there skip the user and membership lookups.
+    :type memberships: dict
+    :return: Number of members that succeeded and failed.
+    :rtype: :class:`HarvestSummary`
+
+    """
+    succeeded = failed = 0
+
+    async def harvest(member_id: str) -> None:
+        nonlocal succeeded, failed
+        try:
+            inventory = await get_user_inventory(
+                member_id, client=client, memberships=memberships.get(member_id) if memberships else None
+            )
+            profiles = [profile.dict() for profile in inventory if profile is not None]
+            if not profiles:
+                raise LookupError('No profiles could be retrieved')
+            record = {'member_id': member_id, 'profiles': profiles}
+            succeeded += 1
+        except Exception as e:
+            logger.error(f'Failed to harvest inventory for member {member_id}: {e!r}')
+            record = {'member_id': member_id, 'error': repr(e)}
+            failed += 1
+        # A failed write ends the whole batch
+        output.write(json.dumps(record, default=pydantic_encoder) + '\n')
+
+    async def produce(put: t.Callable[[str], t.Awaitable[None]]) -> None:
+        async for member_id in _iterate(member_ids):
+            await put(member_id)
+
+    await run_bounded([produce], harvest, concurrency)
+    output.flush()
+
+    return HarvestSummary(succeeded, failed)
@@ -0,0 +1,206 @@
+import asyncio
+import json
+import logging
+import sqlite3
+import typing as t
+from collections import Counter, OrderedDict
+from pathlib import Path
+from time import time
+
+from .coalesce import Coalescer
+from .factory import endpoint_name
+
+
+logger = logging.getLogger()
+
+
+__all__ = ('ResponseCache', 'DiskCache', 'DEFAULT_TTLS')
+
+
+"""
+Seconds a successful response of each logical endpoint is cached
+for. Endpoints that are not listed are never cached.
+"""
+DEFAULT_TTLS = {
+    'settings': 24 * 60 * 60,
+    'stats_definition': 24 * 60 * 60,
+    'entity_manifest': 24 * 60 * 60,
+    'manifest': 60 * 60,
+    'user': 10 * 60,
+    'user_names': 10 * 60,
+    'memberships': 10 * 60,
+    'clan_members': 10 * 60,
+}
+
+
+class DiskCache:
+    """
+    Persistent cache backend storing responses in a SQLite file so
+    they survive restarts.
+
+    :param path: Path of the SQLite cache file.
+    :type path: str or Path
+
+    """
+
+    def __init__(self, path: t.Union[str, Path]) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        self._connection.execute(
+            'CREATE TABLE IF NOT EXISTS responses (url TEXT PRIMARY KEY, expires REAL, body TEXT)'
+        )
+        self._lock = asyncio.Lock()
+
+    def _get(self, url: str) -> t.Optional[t.Tuple[float, t.Dict]]:
+        row = self._connection.execute('SELECT expires, body FROM responses WHERE url = ?', (url,)).fetchone()
+        if row is None:
+            return None
+        return row[0], json.loads(row[1])
+
+    def _set(self, url: str, expires: float, body: t.Dict) -> None:
+        with self._connection:
+            self._connection.execute(
+                'INSERT OR REPLACE INTO responses VALUES (?, ?, ?)', (url, expires, json.dumps(body))
+            )
+
+    async def get(self, url: str) -> t.Optional[t.Tuple[float, t.Dict]]:
+        async with self._lock:
+            return await asyncio.to_thread(self._get, url)
+
+    async def set(self, url: str, expires: float, body: t.Dict) -> None:
+        async with self._lock:
+            await asyncio.to_thread(self._set, url, expires, body)
+
+    def purge(self) -> None:
+        """
+        Removes every expired response from the file.
+        """
+        with self._connection:
+            self._connection.execute('DELETE FROM responses WHERE expires <= ?', (time(),))
+
+    def close(self) -> None:
+        self._connection.close()
+
+
+class ResponseCache:
+    """
+    Cache in front of :meth:`~.client.ApiClient.get_json`, keyed on the
+    request url.
+
+    Successful responses are kept in an in-memory LRU of at most
+    `max_entries` responses for the TTL of their logical endpoint (see
+    :func:`~.factory.endpoint_name`), and are optionally written
+    through to a :class:`DiskCache`. Concurrent requests for the same
+    url share one network call whether or not the endpoint is cached.
+
+    :param max_entries: Maximum number of responses kept in memory.
+    :type max_entries: int
+    :param ttls: Seconds each endpoint is cached for, defaults to
+        :data:`DEFAULT_TTLS`.
+    :type ttls: dict
+    :param disk: Optional persistent backend.
+    :type disk: :class:`DiskCache`
+
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttls: t.Optional[t.Dict[str, float]] = None,
+        disk: t.Optional[DiskCache] = None
+        ) -> None:
+
+        self.max_entries = max_entries
+        self.ttls = dict(DEFAULT_TTLS if ttls is None else ttls)
+        self.disk = disk
+        self._entries: t.OrderedDict[str, t.Tuple[float, t.Dict]] = OrderedDict()
+        self._in_flight = Coalescer()
+
+        self.hits: t.Counter[str] = Counter()
+        self.misses: t.Counter[str] = Counter()
+        self.coalesced: t.Counter[str] = Counter()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _remember(self, url: str, expires: float, body: t.Dict) -> None:
+        self._entries[url] = (expires, body)
+        self._entries.move_to_end(url)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def _lookup(self, url: str) -> t.Optional[t.Dict]:
+        now = time()
+        if (entry := self._entries.get(url)) is not None:
+            expires, body = entry
+            if expires > now:
+                self._entries.move_to_end(url)
+                return body
+            del self._entries[url]
+
+        if self.disk is not None and (entry := await self.disk.get(url)) is not None:
+            expires, body = entry
+            if expires > now:
+                self._remember(url, expires, body)
+                return body
+        return None
+
+    async def fetch(self, url: str, loader: t.Callable[[], t.Awaitable[t.Dict]]) -> t.Dict:
+        """
+        Returns the cached response of `url` or awaits `loader` to
+        retrieve it. Only responses with a successful `ErrorCode` are
+        cached.
+        """
+        body, _ = await self.fetch_with_source(url, loader)
+        return body
+
+    async def fetch_with_source(
+        self,
+        url: str,
+        loader: t.Callable[[], t.Awaitable[t.Dict]]
+        ) -> t.Tuple[t.Dict, str]:
+        """
+        :meth:`fetch` that also returns how the response was obtained:
+        `hit` from memory or disk, `coalesced` from a request to the same
+        url already in flight, or `miss` from `loader`.
+        """
+        endpoint = endpoint_name(url)
+        ttl = self.ttls.get(endpoint, 0)
+
+        if ttl > 0 and (body := await self._lookup(url)) is not None:
+            self.hits[endpoint] += 1
+            return body, 'hit'
+
+        async def load() -> t.Dict:
+            self.misses[endpoint] += 1
+            body = await loader()
+            if ttl > 0 and body.get('ErrorCode') == 1:
+                expires = time() + ttl
+                self._remember(url, expires, body)
+                if self.disk is not None:
+                    await self.disk.set(url, expires, body)
+            return body
+
+        body, coalesced = await self._in_flight.run(url, load)
+        if coalesced:
+            self.coalesced[endpoint] += 1
+            return body, 'coalesced'
+        return body, 'miss'
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    @property
+    def stats(self) -> t.Dict[str, t.Dict[str, int]]:
+        """
+        Hits, misses and coalesced requests per logical endpoint.
+        """
+        endpoints = set(self.hits) | set(self.misses) | set(self.coalesced)
+        return {
+            endpoint: {
+                'hits': self.hits[endpoint],
+                'misses': self.misses[endpoint],
+                'coalesced': self.coalesced[endpoint],
+            } for endpoint in sorted(endpoints)
+        }
@@ -0,0 +1,111 @@
+import logging
+import typing as t
+from urllib.parse import urlencode
+
+from models import *
+from .bulk import HarvestSummary, harvest_inventories
+from .client import ApiClient
+from .common import *
+from .factory import url_builder
+from .get import get_request, iter_result_pages
+
+
+logger = logging.getLogger()
+
+
+__all__ = ('get_clan_members_page', 'iter_clan_members', 'get_clan_members', 'roster_memberships',
+           'harvest_clan_inventories')
+
+
+async def get_clan_members_page(
+    group_id: str,
+    page: int = 1,
+    client: t.Optional[ApiClient] = None
+    ) -> GenericApiResponse:
+    """
+    Fetches one page of the members of a clan. Pages start at 1.
+    """
+    query = urlencode({'currentpage': page, 'memberType': 0})
+    members_url = url_builder('group', str(group_id), 'Members', f'?{query}')
+    members_data: GenericApiResponse = await get_request(members_url, client=client)
+    return members_data
+
+
+def _roster_results(page: t.Optional[GenericApiResponse]) -> t.Dict:
+    if page is None or not page.response:
+        return {}
+    return page.response
+
+
+async def iter_clan_members(
+    group_id: str,
+    client: t.Optional[ApiClient] = None,
+    concurrency: int = SEARCH_CONCURRENCY
+    ) -> t.AsyncIterator[ClanMember]:
+    """
+    Yields every member of a clan, fetching the pages of the roster
+    concurrently, see :func:`~.get.iter_result_pages`.
+    """
+    async def fetch_page(page_number: int) -> GenericApiResponse:
+        return await get_clan_members_page(group_id, page_number, client=client)
+
+    async for page in iter_result_pages(fetch_page, 1, concurrency, _roster_results):
+        for member in _roster_results(page).get('results') or []:
+            yield ClanMember.parse_obj(member)
+
+
+async def get_clan_members(
+    group_id: str,
+    client: t.Optional[ApiClient] = None,
+    concurrency: int = SEARCH_CONCURRENCY
+    ) -> t.List[ClanMember]:
+    """
+    Returns every member of a clan, see :func:`iter_clan_members`.
+    """
+    return [member async for member in iter_clan_members(group_id, client=client, concurrency=concurrency)]
+
+
+def _member_id(member: ClanMember) -> str:
+    if member.bungie_net_user_info is not None and member.bungie_net_user_info.membership_id:
+        return member.bungie_net_user_info.membership_id
+    return member.destiny_user_info.membership_id
+
+
+def roster_memberships(members: t.Iterable[ClanMember]) -> t.Dict[str, PlatformMembership]:
+    """
+    Builds the :class:`~.models.PlatformMembership` of every member
+    from the Destiny profile the roster already returned, by Bungie.net
+    member ID or, for members without one, by Destiny membership ID.
+    The profile is the one that joined the clan, the cross save
+    primary for members using cross save.
+    """
+    return {
+        _member_id(member): PlatformMembership(
+            profiles=[member.destiny_user_info], bnetMembership=member.bungie_net_user_info
+        )
+        for member in members
+    }
+
+
+async def harvest_clan_inventories(
+    group_id: str,
+    output: t.TextIO,
+    concurrency: int = HARVEST_CONCURRENCY,
+    client: t.Optional[ApiClient] = None
+    ) -> HarvestSummary:
+    """
+    Fetches the inventory of every member of a clan and writes one JSON
+    line per member to `output`, see
+    :func:`~.bulk.harvest_inventories`.
+
+    Members are resolved from the roster with :func:`roster_memberships`,
+    so only the profile requests of each member are sent and none of
+    the user or membership lookups.
+    """
+    members = await get_clan_members(group_id, client=client)
+    if not members:
+        logger.error(f'Could not retrieve the members of clan {group_id}')
+        return HarvestSummary(0, 0)
+
+    memberships = roster_memberships(members)
+    return await harvest_inventories(memberships, output, concurrency, client=client, memberships=memberships)
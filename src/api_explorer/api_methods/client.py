@@ -0,0 +1,358 @@
+import aiofiles
+import asyncio
+import json
+import logging
+import typing as t
+from pathlib import Path
+from time import perf_counter
+from aiohttp import ClientResponse, ClientSession, ClientTimeout, ContentTypeError, TCPConnector
+
+from .cache import ResponseCache
+from .common import *
+from .factory import endpoint_name
+from .memberships import MembershipResolver
+from .metrics import Metrics
+from .replay import ReplayStore
+from .throttle import RETRY_STATUSES, THROTTLE_ERROR_CODES, RateLimiter
+
+
+logger = logging.getLogger()
+
+
+# Counter of Metrics recording each source of ResponseCache.fetch_with_source
+CACHE_SOURCE_COUNTERS = {'hit': 'cache_hits', 'coalesced': 'coalesced', 'miss': 'cache_misses'}
+
+
+__all__ = ('ApiClient', 'get_default_client', 'set_default_client', 'close_default_client')
+
+
+class ApiClient:
+    """
+    Long-lived HTTP client that owns a single pooled
+    :class:`aiohttp.ClientSession`. Connections are kept alive and
+    DNS lookups are cached between requests, so repeated calls to the
+    same host skip the TCP/TLS handshake.
+
+    Can be used as an async context manager::
+
+        async with ApiClient(limit_per_host=20) as client:
+            user = await get_user_data(member_id, client=client)
+
+    :param limit: Total number of simultaneous connections in the pool.
+    :type limit: int
+    :param limit_per_host: Simultaneous connections to a single host.
+    :type limit_per_host: int
+    :param dns_cache_ttl: Seconds a resolved host is cached for.
+    :type dns_cache_ttl: int
+    :param keepalive_timeout: Seconds an idle connection is kept open.
+    :type keepalive_timeout: float
+    :param timeout: Total timeout in seconds for a single request.
+    :type timeout: float
+    :param headers: Headers sent with every request, defaults to :data:`HEADERS`.
+    :type headers: dict
+    :param rate_limiter: Rate limiter shared by every request of the
+        client, defaults to a :class:`~.throttle.RateLimiter` with its
+        default budget.
+    :type rate_limiter: :class:`~.throttle.RateLimiter`
+    :param cache: Optional cache consulted by :meth:`get_json` before
+        going to the network.
+    :type cache: :class:`~.cache.ResponseCache`
+    :param base_url: Replaces the `https://www.bungie.net` root of every
+        url, e.g. to send requests to a local stub server.
+    :type base_url: str
+    :param replay: Serve every request from recorded responses instead
+        of the network.
+    :type replay: :class:`~.replay.ReplayStore`
+    :param record: Record every live response into this store.
+    :type record: :class:`~.replay.ReplayStore`
+    :param json_loads: Decoder applied to the raw response bytes, e.g.
+        `orjson.loads` for faster decoding of large profiles.
+    :type json_loads: Callable
+    :param resolver: Memoizes user and membership lookups, defaults to
+        a :class:`~.memberships.MembershipResolver` with its default TTL.
+    :type resolver: :class:`~.memberships.MembershipResolver`
+    :param metrics: Records the latency, size, retries and cache hits
+        of every request when given.
+    :type metrics: :class:`~.metrics.Metrics`
+
+    """
+
+    def __init__(
+        self,
+        limit: int = 100,
+        limit_per_host: int = 10,
+        dns_cache_ttl: int = 300,
+        keepalive_timeout: float = 30.0,
+        timeout: float = 30.0,
+        headers: t.Optional[t.Dict[str, str]] = None,
+        rate_limiter: t.Optional[RateLimiter] = None,
+        cache: t.Optional[ResponseCache] = None,
+        base_url: t.Optional[str] = None,
+        replay: t.Optional[ReplayStore] = None,
+        record: t.Optional[ReplayStore] = None,
+        json_loads: t.Callable[[bytes], t.Any] = json.loads,
+        resolver: t.Optional[MembershipResolver] = None,
+        metrics: t.Optional[Metrics] = None
+        ) -> None:
+
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.dns_cache_ttl = dns_cache_ttl
+        self.keepalive_timeout = keepalive_timeout
+        self.timeout = timeout
+        self.headers = {k: v for k, v in (HEADERS if headers is None else headers).items() if v is not None}
+        self.rate_limiter = RateLimiter() if rate_limiter is None else rate_limiter
+        self.cache = cache
+        self.base_url = base_url
+        self.replay = replay
+        self.record = record
+        self.json_loads = json_loads
+        self.resolver = MembershipResolver() if resolver is None else resolver
+        self.metrics = metrics
+        self._session: t.Optional[ClientSession] = None
+        self._loop: t.Optional[asyncio.AbstractEventLoop] = None
+
+    async def __aenter__(self) -> 'ApiClient':
+        self.session
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    @property
+    def closed(self) -> bool:
+        return self._session is None or self._session.closed
+
+    @property
+    def session(self) -> ClientSession:
+        """
+        The pooled session, created on first use inside the running
+        event loop. A session bound to a loop that is no longer running
+        is discarded and replaced.
+        """
+        loop = asyncio.get_running_loop()
+        if self._session is not None and self._loop is not loop:
+            self._session = None
+        if self.closed:
+            connector = TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                ttl_dns_cache=self.dns_cache_ttl,
+                use_dns_cache=True,
+                keepalive_timeout=self.keepalive_timeout
+            )
+            self._session = ClientSession(
+                connector=connector,
+                headers=self.headers,
+                timeout=ClientTimeout(total=self.timeout),
+                trace_configs=[self.metrics.trace_config()] if self.metrics is not None else None
+            )
+            self._loop = loop
+        return self._session
+
+    def resolve(self, url: str) -> str:
+        """
+        Returns `url` with its root, or the root of the stats host,
+        replaced by :attr:`base_url`.
+        """
+        if self.base_url is not None:
+            for root in (ROOT, STATS_ROOT):
+                if url.startswith(root):
+                    return self.base_url.rstrip('/') + url[len(root):]
+        return url
+
+    async def request_json(
+        self, 
+        url: str, 
+        headers: t.Optional[t.Dict[str, str]] = None
+        ) -> t.Tuple[int, t.Mapping[str, str], t.Optional[t.Dict]]:
+        """
+        Performs a `GET` request through the shared pool.
+
+        Every attempt takes a token from :attr:`rate_limiter`. Responses
+        with an HTTP 429/503 status or a throttle `ErrorCode` are retried
+        after backing off for the `Retry-After`/`ThrottleSeconds` the
+        server reported, or a jittered exponential delay otherwise.
+
+        :param url: Url to send the request to.
+        :type url: str
+        :param headers: Extra headers sent with this request only.
+        :type headers: dict
+        :return: Status, headers and decoded JSON body of the response.
+            The body is None for a `304 Not Modified` response.
+        :rtype: tuple
+        :raises ClientResponseError: If the request is still rejected
+            with a retryable status once the retries are exhausted.
+
+        """
+        if self.replay is not None:
+            if (body := self.replay.load(url)) is None:
+                raise FileNotFoundError(f'No recorded response for {url}')
+            return 200, {}, body
+
+        limiter = self.rate_limiter
+        metrics = self.metrics
+        endpoint = endpoint_name(url) if metrics is not None else None
+
+        for attempt in range(limiter.max_retries + 1):
+            start = perf_counter()
+            await limiter.acquire()
+            if metrics is not None:
+                metrics.observe('rate_limit_wait_seconds', endpoint, perf_counter() - start)
+                start = perf_counter()
+
+            async with self.session.get(self.resolve(url), headers=headers) as r:
+                if r.status in RETRY_STATUSES:
+                    if attempt == limiter.max_retries:
+                        r.raise_for_status()
+                    retry_after = r.headers.get('Retry-After', '')
+                    limiter.throttle(float(retry_after) if retry_after.isdigit() else limiter.backoff(attempt))
+                    limiter.retries += 1
+                    if metrics is not None:
+                        metrics.increment('retries', endpoint)
+                    continue
+                if r.status == 304:
+                    return r.status, r.headers, None
+                raw = await r.read()
+                decode_start = perf_counter()
+                body = self._decode(r, raw)
+
+            if metrics is not None:
+                end = perf_counter()
+                metrics.observe('decode_seconds', endpoint, end - decode_start)
+                metrics.observe('request_seconds', endpoint, end - start)
+                metrics.observe('response_bytes', endpoint, len(raw))
+
+            throttle_seconds = body.get('ThrottleSeconds') or 0
+            if body.get('ErrorCode') in THROTTLE_ERROR_CODES and attempt < limiter.max_retries:
+                limiter.throttle(max(throttle_seconds, limiter.backoff(attempt)))
+                limiter.retries += 1
+                if metrics is not None:
+                    metrics.increment('retries', endpoint)
+                continue
+            limiter.throttle(throttle_seconds)
+            if self.record is not None:
+                self.record.save(url, body)
+            return r.status, r.headers, body
+
+    async def get_json(self, url: str) -> t.Dict:
+        """
+        Performs a `GET` request through :meth:`request_json` and
+        returns the decoded JSON body, served from :attr:`cache` when
+        one is configured.
+        """
+        if self.cache is None:
+            return await self._get_body(url)
+        if self.metrics is None:
+            return await self.cache.fetch(url, lambda: self._get_body(url))
+
+        body, source = await self.cache.fetch_with_source(url, lambda: self._get_body(url))
+        self.metrics.increment(CACHE_SOURCE_COUNTERS[source], endpoint_name(url))
+        return body
+
+    async def _get_body(self, url: str) -> t.Dict:
+        _, _, body = await self.request_json(url)
+        return body
+
+    async def post_json(self, url: str, data: t.Any = None) -> t.Dict:
+        await self.rate_limiter.acquire()
+        async with self.session.post(self.resolve(url), data=data) as r:
+            return self._decode(r, await r.read())
+
+    def _decode(self, response: ClientResponse, raw: bytes) -> t.Any:
+        """
+        Decodes a response body with :attr:`json_loads`. A body that is
+        not JSON, e.g. the HTML page of a gateway error, raises the
+        :class:`aiohttp.ContentTypeError` :meth:`ClientResponse.json`
+        would have, so callers handle it as any other response error.
+        """
+        try:
+            return self.json_loads(raw)
+        except ValueError as e:
+            raise ContentTypeError(
+                response.request_info,
+                response.history,
+                status=response.status,
+                message=f'Could not decode the response body as JSON: {e}',
+                headers=response.headers
+            ) from e
+
+    async def stream(self, url: str, chunk_size: int = 1 << 16) -> t.AsyncIterator[bytes]:
+        """
+        Yields the raw body of a `GET` request in chunks as it is
+        received. Throttled responses are not retried since the body
+        may already be partially consumed.
+
+        :param url: Url to send the request to.
+        :type url: str
+        :raises ClientResponseError: If the response status is an error.
+
+        """
+        if self.replay is not None:
+            if (body := self.replay.load(url)) is None:
+                raise FileNotFoundError(f'No recorded response for {url}')
+            data = json.dumps(body).encode()
+            for i in range(0, len(data), chunk_size):
+                yield data[i:i + chunk_size]
+            return
+
+        await self.rate_limiter.acquire()
+        async with self.session.get(self.resolve(url)) as r:
+            if r.status in RETRY_STATUSES:
+                retry_after = r.headers.get('Retry-After', '')
+                self.rate_limiter.throttle(float(retry_after) if retry_after.isdigit() else self.rate_limiter.backoff(0))
+            r.raise_for_status()
+            async for chunk in r.content.iter_chunked(chunk_size):
+                yield chunk
+
+    async def download(self, url: str, destination: t.Union[str, Path], chunk_size: int = 1 << 16) -> Path:
+        """
+        Streams the body of a `GET` request to `destination` without
+        holding it in memory.
+
+        :param url: Url of the file to download.
+        :type url: str
+        :param destination: Path the body is written to.
+        :type destination: str or Path
+        :return: Path of the written file.
+        :rtype: Path
+
+        """
+        destination = Path(destination)
+        await self.rate_limiter.acquire()
+        async with self.session.get(self.resolve(url), timeout=ClientTimeout(total=None)) as r:
+            r.raise_for_status()
+            async with aiofiles.open(destination, 'wb') as f:
+                async for chunk in r.content.iter_chunked(chunk_size):
+                    await f.write(chunk)
+        return destination
+
+    async def close(self) -> None:
+        if not self.closed:
+            await self._session.close()
+        self._session = None
+        self._loop = None
+
+
+_default_client: t.Optional[ApiClient] = None
+
+
+def get_default_client() -> ApiClient:
+    """
+    Returns the module level client used when no client is passed to
+    a request function, creating it on first use.
+    """
+    global _default_client
+    if _default_client is None:
+        _default_client = ApiClient()
+    return _default_client
+
+
+def set_default_client(client: t.Optional[ApiClient]) -> None:
+    global _default_client
+    _default_client = client
+
+
+async def close_default_client() -> None:
+    if _default_client is not None:
+        await _default_client.close()
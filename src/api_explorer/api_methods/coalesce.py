@@ -0,0 +1,66 @@
+import asyncio
+import logging
+import typing as t
+
+
+logger = logging.getLogger()
+
+
+__all__ = ('Coalescer',)
+
+
+class _LeaderCancelled(Exception):
+    """
+    Raised to the callers waiting on a call that was cancelled, so one
+    of them issues it again.
+    """
+
+
+class Coalescer:
+    """
+    Shares a single in-flight call per key between concurrent callers.
+    The first caller of a key runs its loader, the others wait for its
+    result and receive the same value or exception.
+
+    If the leading call is cancelled, e.g. because its client went
+    away, the waiters are not failed with the cancellation. The key is
+    released and one of them issues the call again.
+    """
+
+    def __init__(self) -> None:
+        self._in_flight: t.Dict[t.Hashable, asyncio.Future] = {}
+
+    def __len__(self) -> int:
+        return len(self._in_flight)
+
+    def __contains__(self, key: t.Hashable) -> bool:
+        return key in self._in_flight
+
+    async def run(self, key: t.Hashable, loader: t.Callable[[], t.Awaitable[t.Any]]) -> t.Tuple[t.Any, bool]:
+        """
+        Awaits `loader` unless a call of `key` is already in flight, in
+        which case its result is awaited instead.
+
+        :return: The value and whether it came from another caller.
+        :rtype: tuple
+
+        """
+        while (in_flight := self._in_flight.get(key)) is not None:
+            try:
+                return await asyncio.shield(in_flight), True
+            except _LeaderCancelled:
+                continue
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            value = await loader()
+        except BaseException as e:
+            future.set_exception(e if isinstance(e, Exception) else _LeaderCancelled())
+            # Retrieve the exception so it is not reported as never retrieved
+            future.exception()
+            raise
+        finally:
+            del self._in_flight[key]
+        future.set_result(value)
+        return value, False
@@ -1,13 +1,17 @@
 from dotenv import load_dotenv
 from os import environ
+from pathlib import Path
 
 from models import *
 
 
 load_dotenv()
 
-__all__ = ('client_id', 'HEADERS', 'BASE', 'DESTINY2', 'SETTINGS', 'TOKEN',
-           'USER', 'GROUP', 'OAUTH', 'ARMORY', 'STATS', 'DEFAULT_COMPONENTS')
+__all__ = ('client_id', 'HEADERS', 'ROOT', 'BASE', 'DESTINY2', 'SETTINGS', 'TOKEN',
+           'USER', 'GROUP', 'OAUTH', 'ARMORY', 'STATS', 'STATS_ROOT', 'PGCR', 'DEFAULT_COMPONENTS',
+           'PROFILE_CONCURRENCY', 'HARVEST_CONCURRENCY', 'SEARCH_CONCURRENCY',
+           'ACTIVITY_PAGE_CONCURRENCY', 'PGCR_CONCURRENCY',
+           'MANIFEST_LOCALE', 'RESOURCES')
 
 api_key = environ.get('API_KEY')
 client_id = environ.get('CLIENT_ID')
@@ -18,7 +22,8 @@ HEADERS = {'X-API-KEY': api_key}
 """
 Platform URLs
 """
-BASE = 'https://www.bungie.net/Platform'
+ROOT = 'https://www.bungie.net'
+BASE = '/'.join([ROOT, 'Platform'])
 OAUTH='https://www.bungie.net/en/OAuth/Authorize'
 DESTINY2 = '/'.join([BASE, 'Destiny2'])
 USER = '/'.join([BASE, 'User'])
@@ -28,9 +33,57 @@ STATS = '/'.join([DESTINY2, 'Stats', 'Definition'])
 SETTINGS = '/'.join([BASE, 'Settings'])
 TOKEN = '/'.join([BASE, 'App', 'OAuth', 'Token'])
 
+# Post game carnage reports are only served from the stats host
+STATS_ROOT = 'https://stats.bungie.net'
+PGCR = '/'.join([STATS_ROOT, 'Platform', 'Destiny2', 'Stats', 'PostGameCarnageReport'])
+
 
 """
 Default set of components used when loading a user's
 inventory.
 """
-DEFAULT_COMPONENTS = [102, 103, 200, 201, 205, 300, 305, 310]
\ No newline at end of file
+DEFAULT_COMPONENTS = [102, 103, 200, 201, 205, 300, 305, 310]
+
+
+"""
+Maximum number of profile requests in flight at once when
+fetching the components of every profile linked to a user.
+"""
+PROFILE_CONCURRENCY = 4
+
+
+"""
+Default number of members whose inventories are fetched at
+once by the bulk harvester.
+"""
+HARVEST_CONCURRENCY = 8
+
+"""
+Maximum number of result pages of an entity search requested at
+once when every page is fetched.
+"""
+SEARCH_CONCURRENCY = 4
+
+"""
+Number of activity history pages of one character requested at
+once.
+"""
+ACTIVITY_PAGE_CONCURRENCY = 4
+
+"""
+Default number of post game carnage reports fetched at once.
+"""
+PGCR_CONCURRENCY = 16
+
+
+"""
+Locale of the manifest world content database used for local
+definition lookups.
+"""
+MANIFEST_LOCALE = 'en'
+
+
+"""
+Directory of the response snapshots bundled with the repository.
+"""
+RESOURCES = Path(__file__).resolve().parents[3].joinpath('resources')
\ No newline at end of file
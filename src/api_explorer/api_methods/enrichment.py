@@ -0,0 +1,124 @@
+import logging
+import typing as t
+import numpy as np
+import pandas as pd
+
+from models import *
+from .manifest import ManifestDatabase
+
+
+logger = logging.getLogger()
+
+
+__all__ = ('items_frame', 'item_definitions_frame', 'bucket_definitions_frame', 'enrich_inventory')
+
+
+ITEM_COLUMNS = {
+    'membership_id': object,
+    'owner': object,
+    'section': object,
+    'item_instance_id': object,
+    'item_hash': np.int64,
+    'bucket_hash': np.int64,
+    'location': np.int16,
+    'quantity': np.int32,
+    'state': np.int32,
+    'bind_status': np.int16,
+    'transfer_status': np.int16,
+}
+
+
+def items_frame(profiles: t.Union[D2Profile, t.Iterable[D2Profile]]) -> pd.DataFrame:
+    """
+    Flattens every item of one or many profiles into a single table,
+    one row per item, with integer typed hash columns.
+
+    :param profiles: Profile or profiles whose items are collected.
+    :return: Table with the columns of :data:`ITEM_COLUMNS`.
+    :rtype: :class:`pandas.DataFrame`
+
+    """
+    if isinstance(profiles, D2Profile):
+        profiles = [profiles]
+
+    columns = {name: [] for name in ITEM_COLUMNS}
+
+    for profile in profiles:
+        if profile is None:
+            continue
+        membership_id = profile.profile.data.user_info.membership_id
+        for owner, section, item in profile.iter_items():
+            columns['membership_id'].append(membership_id)
+            columns['owner'].append(owner)
+            columns['section'].append(section)
+            columns['item_instance_id'].append(getattr(item, 'item_instance_id', None))
+            columns['item_hash'].append(int(item.item_hash))
+            columns['bucket_hash'].append(int(item.bucket_hash))
+            columns['location'].append(item.location)
+            columns['quantity'].append(item.quantity)
+            columns['state'].append(item.state)
+            columns['bind_status'].append(item.bind_status)
+            columns['transfer_status'].append(item.transfer_status)
+
+    return pd.DataFrame({
+        name: np.asarray(values, dtype=ITEM_COLUMNS[name]) for name, values in columns.items()
+    })
+
+
+def item_definitions_frame(manifest: ManifestDatabase, item_hashes: t.Iterable[int]) -> pd.DataFrame:
+    """
+    Resolves unique item hashes against `DestinyInventoryItemDefinition`
+    in one bulk lookup.
+    """
+    definitions = manifest.get_definitions('DestinyInventoryItemDefinition', item_hashes)
+    return pd.DataFrame({
+        'item_hash': np.fromiter(definitions.keys(), dtype=np.int64, count=len(definitions)),
+        'item_name': [d.get('displayProperties', {}).get('name') for d in definitions.values()],
+        'item_type': [d.get('itemType') for d in definitions.values()],
+        'item_type_name': [d.get('itemTypeDisplayName') for d in definitions.values()],
+        'tier_type': [d.get('inventory', {}).get('tierType') for d in definitions.values()],
+        'tier_type_name': [d.get('inventory', {}).get('tierTypeName') for d in definitions.values()],
+        'default_bucket_hash': [d.get('inventory', {}).get('bucketTypeHash') for d in definitions.values()],
+    })
+
+
+def bucket_definitions_frame(manifest: ManifestDatabase, bucket_hashes: t.Iterable[int]) -> pd.DataFrame:
+    """
+    Resolves unique bucket hashes against `DestinyInventoryBucketDefinition`
+    in one bulk lookup.
+    """
+    definitions = manifest.get_definitions('DestinyInventoryBucketDefinition', bucket_hashes)
+    return pd.DataFrame({
+        'bucket_hash': np.fromiter(definitions.keys(), dtype=np.int64, count=len(definitions)),
+        'bucket_name': [d.get('displayProperties', {}).get('name') for d in definitions.values()],
+        'bucket_category': [d.get('category') for d in definitions.values()],
+    })
+
+
+def enrich_inventory(
+    profiles: t.Union[D2Profile, t.Iterable[D2Profile]],
+    manifest: ManifestDatabase
+    ) -> pd.DataFrame:
+    """
+    Joins every item of one or many profiles to its item and bucket
+    definitions. Hashes are deduplicated across all profiles before
+    they are resolved, so each definition is read from the manifest
+    once regardless of how many items reference it.
+
+    :param profiles: Profile or profiles to enrich.
+    :param manifest: Local manifest the definitions are read from.
+    :type manifest: :class:`~.manifest.ManifestDatabase`
+    :return: One row per item with its definition columns, unresolved
+        hashes are left as missing values.
+    :rtype: :class:`pandas.DataFrame`
+
+    """
+    items = items_frame(profiles)
+    item_definitions = item_definitions_frame(manifest, pd.unique(items['item_hash']).tolist())
+    bucket_definitions = bucket_definitions_frame(manifest, pd.unique(items['bucket_hash']).tolist())
+
+    return (
+        items
+        .merge(item_definitions, on='item_hash', how='left')
+        .merge(bucket_definitions, on='bucket_hash', how='left')
+    )
@@ -1,13 +1,34 @@
 import logging
+import re
 import typing as t
 
 from .common import *
 
-__all__ = ['url_builder']
+__all__ = ['url_builder', 'endpoint_name']
 
 logger = logging.getLogger()
 
 
+"""
+Logical endpoint names, matched in order against the path of a
+request url.
+"""
+ENDPOINT_PATTERNS = [
+    ('stats_definition', re.compile(r'/Destiny2/Stats/Definition')),
+    ('pgcr', re.compile(r'/Destiny2/Stats/PostGameCarnageReport/')),
+    ('activity_history', re.compile(r'/Character/\d+/Stats/Activities')),
+    ('settings', re.compile(r'/Settings')),
+    ('manifest', re.compile(r'/Destiny2/Manifest/?$')),
+    ('entity_manifest', re.compile(r'/Destiny2/Manifest/')),
+    ('user', re.compile(r'/User/GetBungieNetUserById/')),
+    ('user_names', re.compile(r'/User/GetSanitizedPlatformDisplayNames/')),
+    ('memberships', re.compile(r'/LinkedProfiles')),
+    ('profile', re.compile(r'/Destiny2/\d+/Profile/')),
+    ('entity_search', re.compile(r'/Armory/Search/')),
+    ('clan_members', re.compile(r'/GroupV2/\d+/Members')),
+]
+
+
 def url_handler(url_base: str, *args) -> str:
     if not args:
         return f'{url_base}/'
@@ -26,5 +47,22 @@ def url_builder(request_type: str, *args) -> t.Union[str, None]:
             return url_handler(DESTINY2, *args)
         case 'armory':
             return url_handler(ARMORY, *args)
+        case 'group':
+            return url_handler(GROUP, *args)
+        case 'pgcr':
+            return url_handler(PGCR, *args)
         case _:
             return url_handler(BASE, *args)
+
+
+def endpoint_name(url: str) -> str:
+    """
+    Returns the logical endpoint a url built by :func:`url_builder`
+    addresses, e.g. `profile` or `memberships`, or `other` if it
+    is not a known endpoint.
+    """
+    path = url.split('?', 1)[0]
+    for name, endpoint_pattern in ENDPOINT_PATTERNS:
+        if endpoint_pattern.search(path):
+            return name
+    return 'other'
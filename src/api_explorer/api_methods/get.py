@@ -1,13 +1,19 @@
+import asyncio
 import logging
+import math
 import typing as t
-from aiohttp import ClientSession
 from aiohttp.client_exceptions import ClientResponseError
 from pathlib import Path
+from time import perf_counter
 from urllib.parse import urlencode
 
 from models import *
+from .client import ApiClient, get_default_client
 from .common import *
-from .factory import url_builder
+from .factory import endpoint_name, url_builder
+
+if t.TYPE_CHECKING:
+    from .manifest import ManifestDatabase
 
 
 logger = logging.getLogger()
@@ -16,11 +22,17 @@ logger = logging.getLogger()
 __all__ = ('get_user_data', 'get_cleaned_user_names', 'get_d2_manifest', 
            'get_bnet_settings', 'search_destiny_entities',
            'get_historical_stats_definition', 'get_components', 'get_platform_memberships',
-           'get_user_inventory', 'get_entity_manifest')
+           'get_user_inventory', 'get_entity_manifest', 'get_profile_components',
+           'get_profiles_components', 'iter_result_pages', 'iter_destiny_entity_pages',
+           'search_all_destiny_entities')
 
 
 
-def response_handler(response: GenericApiResponse, target: t.Optional[ScopedApiRespone] = None) -> t.Union[GenericApiResponse, ScopedResponse]:
+def response_handler(
+    response: GenericApiResponse, 
+    target: t.Optional[ScopedApiRespone] = None,
+    lazy: bool = False
+    ) -> t.Union[GenericApiResponse, ScopedResponse, LazyModel]:
     """
     If the source request is successful, returns
     :attr:`~.models.GenericApiResponse.Response`, otherwise returns
@@ -28,6 +40,10 @@ def response_handler(response: GenericApiResponse, target: t.Optional[ScopedApiR
 
     :param response: Result of a request execution.
     :type response: :class:`~.models.GenericApiResponse`
+    :param lazy: Wrap the `Response` in a :class:`~.models.LazyModel`
+        that validates each field of `target` on first access instead
+        of validating it all up front.
+    :type lazy: bool
     :return: Base response object or that object's `Response` attribute.
     :rtype: :class:`~.models.GenericApiResponse`
 
@@ -39,91 +55,315 @@ def response_handler(response: GenericApiResponse, target: t.Optional[ScopedApiR
         return GenericApiResponse.parse_obj(response)
     
     if target is not None:
+        if lazy:
+            return LazyModel(target, response['Response'])
         return target.parse_obj(response.get('Response'))
     return GenericApiResponse.parse_obj(response)
 
-async def get_request(url: str, target: t.Optional[ScopedApiRespone] = None) -> t.Union[GenericApiResponse, ScopedResponse]:
+async def get_request(
+    url: str, 
+    target: t.Optional[ScopedApiRespone] = None, 
+    client: t.Optional[ApiClient] = None,
+    lazy: bool = False
+    ) -> t.Union[GenericApiResponse, ScopedResponse, LazyModel]:
     """
-    Performs an asynchronouse HTTP `GET` request. Uses :module:`aiohttp`
-    as the source for creating an awaitable request session.
+    Performs an asynchronouse HTTP `GET` request through the pooled
+    session of an :class:`~.client.ApiClient`.
 
     :param url: Url to send the request to.
     :type url: str
+    :param client: Client to send the request with, defaults to the
+        lazily created module level client.
+    :type client: :class:`~.client.ApiClient`
+    :param lazy: Validate the fields of `target` on first access, see
+        :func:`response_handler`.
+    :type lazy: bool
     :return: A serialized result of the `GET` request's response. 
     :rtype: :class:`~.models.GenericApiResponse` or None
 
     """
+    if client is None:
+        client = get_default_client()
+
     try:
-        async with ClientSession() as session:
-            async with session.get(url, headers=HEADERS) as r:
-                json_res = await r.json()
-                serialized_resp = response_handler(json_res, target)
-                return serialized_resp
+        json_res = await client.get_json(url)
+        if client.metrics is None:
+            return response_handler(json_res, target, lazy)
+        start = perf_counter()
+        serialized_resp = response_handler(json_res, target, lazy)
+        client.metrics.observe('validate_seconds', endpoint_name(url), perf_counter() - start)
+        return serialized_resp
     except ClientResponseError as e:
         logger.exception(e)
         return None
 
-async def get_historical_stats_definition() -> GenericApiResponse:
+async def get_historical_stats_definition(client: t.Optional[ApiClient] = None) -> GenericApiResponse:
     stats_url = url_builder('stats')
-    stats_data: GenericApiResponse = await get_request(stats_url)
+    stats_data: GenericApiResponse = await get_request(stats_url, client=client)
     return stats_data
 
-async def get_d2_manifest() -> GenericApiResponse:
+async def get_d2_manifest(client: t.Optional[ApiClient] = None) -> GenericApiResponse:
     manifest_url = url_builder('d2', 'Manifest')
-    manifest_data: GenericApiResponse = await get_request(manifest_url)
+    manifest_data: GenericApiResponse = await get_request(manifest_url, client=client)
     return manifest_data
 
-async def get_bnet_settings() -> GenericApiResponse:
+async def get_bnet_settings(client: t.Optional[ApiClient] = None) -> GenericApiResponse:
     settings_url = url_builder('settings')
-    settings_data: GenericApiResponse = await get_request(settings_url)
+    settings_data: GenericApiResponse = await get_request(settings_url, client=client)
     return settings_data
 
-async def get_entity_manifest(entity_type: str, hash_id: str) -> GenericApiResponse:
+async def get_entity_manifest(
+    entity_type: str, 
+    hash_id: str, 
+    client: t.Optional[ApiClient] = None,
+    manifest: t.Optional['ManifestDatabase'] = None
+    ) -> GenericApiResponse:
+    """
+    Returns the definition of `hash_id` in the `entity_type` manifest
+    table. If a local :class:`~.manifest.ManifestDatabase` is given the
+    definition is read from it and the API is only queried for hashes
+    or entity types it does not contain.
+    """
+    if manifest is not None:
+        try:
+            definition = manifest.get_definition(entity_type, hash_id)
+        except KeyError:
+            # Tables missing from the local database are read from the API
+            definition = None
+        if definition is not None:
+            return response_handler({
+                'Response': definition, 
+                'ErrorCode': 1, 
+                'ThrottleSeconds': 0, 
+                'ErrorStatus': 'Success', 
+                'Message': 'Ok'
+            })
+
     item_manifest_url = url_builder('d2', 'Manifest', entity_type, hash_id)
-    manifest_data: GenericApiResponse = await get_request(item_manifest_url)
+    manifest_data: GenericApiResponse = await get_request(item_manifest_url, client=client)
     return manifest_data
 
-async def get_user_data(member_id: str) -> UserApiResponse:
+async def get_user_data(member_id: str, client: t.Optional[ApiClient] = None) -> UserApiResponse:
+    if client is None:
+        client = get_default_client()
+
     user_url = url_builder('user', 'GetBungieNetUserById', member_id)
-    user_data: UserApiResponse = await get_request(user_url, UserApiResponse)
+    user_data: UserApiResponse = await client.resolver.resolve(
+        'user', member_id, lambda: get_request(user_url, UserApiResponse, client=client)
+    )
     return user_data
 
-async def get_cleaned_user_names(member_id: str) -> CleanUserNames:
+async def get_cleaned_user_names(member_id: str, client: t.Optional[ApiClient] = None) -> CleanUserNames:
     user_url = url_builder('user', 'GetSanitizedPlatformDisplayNames', member_id)
-    user_data: CleanUserNames = await get_request(user_url, CleanUserNames)
+    user_data: CleanUserNames = await get_request(user_url, CleanUserNames, client=client)
     return user_data
 
 async def get_user_inventory(
     member_id: str, 
     to_file: bool = False, 
-    file_path: t.Union[str, Path, None] = None
+    file_path: t.Union[str, Path, None] = None,
+    client: t.Optional[ApiClient] = None,
+    file_suffix: str = '.json',
+    memberships: t.Optional[PlatformMembership] = None
     ) -> t.List[D2Profile]:
-    
-    user: UserApiResponse = await get_user_data(member_id)
-    memberships: PlatformMembership = await get_platform_memberships(user.membership_id)
+    """
+    Fetches the :data:`DEFAULT_COMPONENTS` of every profile of a
+    member. Pass already resolved `memberships` to skip the user and
+    membership lookups.
+    """
+    if memberships is None:
+        user: UserApiResponse = await get_user_data(member_id, client=client)
+        if user is None:
+            logger.error('Could not retrieve user information')
+            return []
+        memberships = await get_platform_memberships(user.membership_id, client=client)
+
+    if not memberships or not memberships.profiles:
+        logger.error('Could not get user profile information')
+        return []
 
-    inventory = []
+    inventory = await get_profiles_components(memberships, components=DEFAULT_COMPONENTS, client=client)
 
-    for profile in memberships.profiles:
-        profile_inventory = await get_components(profile.membership_id, components=DEFAULT_COMPONENTS)
-        if to_file:
-            inventory_file_handler(profile.display_name.lower(), profile_inventory, file_path)
-        inventory.append(profile_inventory)
+    if to_file:
+        await asyncio.gather(*[
+            inventory_file_handler(profile.display_name.lower(), profile_inventory, file_path, file_suffix)
+            for profile, profile_inventory in zip(memberships.profiles, inventory)
+            if profile_inventory is not None
+        ])
     return inventory
 
-async def search_destiny_entities(entity_type: str, search_term: str, page: int = 0) -> GenericApiResponse:
+async def search_destiny_entities(
+    entity_type: str, 
+    search_term: str, 
+    page: int = 0, 
+    client: t.Optional[ApiClient] = None
+    ) -> GenericApiResponse:
     entity_url = url_builder('armory', 'Search', entity_type, search_term, f'?page={page}')
-    entity_data: GenericApiResponse = await get_request(entity_url)
+    entity_data: GenericApiResponse = await get_request(entity_url, client=client)
     return entity_data
 
-async def get_platform_memberships(membership_id: str) -> PlatformMembership:
+def _search_results(page: t.Optional[GenericApiResponse]) -> t.Dict:
+    if page is None or not page.response:
+        return {}
+    return page.response.get('results') or {}
+
+async def iter_result_pages(
+    fetch_page: t.Callable[[int], t.Awaitable[t.Optional[GenericApiResponse]]],
+    first_page: int = 0,
+    concurrency: int = SEARCH_CONCURRENCY,
+    search_results: t.Callable[[t.Optional[GenericApiResponse]], t.Dict] = _search_results
+    ) -> t.AsyncIterator[GenericApiResponse]:
+    """
+    Yields every page of a paged search result in page order, calling
+    `fetch_page` with the number of each page from `first_page` on.
+    `search_results` returns the search result of a page, with its
+    `results`, `totalResults`, `hasMore` and `query`.
+
+    The first page is fetched on its own to read the total number of
+    results, the remaining pages are then requested concurrently with
+    at most `concurrency` in flight and yielded as soon as every page
+    before them has been. When the API does not report a usable total
+    the pages are walked one after another while it reports more.
+    """
+    page = await fetch_page(first_page)
+    if page is None:
+        return
+    yield page
+
+    results = search_results(page)
+    if not results.get('hasMore'):
+        return
+
+    per_page = (results.get('query') or {}).get('itemsPerPage') or len(results.get('results') or [])
+    if not results.get('useTotalResults') or not per_page:
+        page_number = first_page + 1
+        while results.get('hasMore'):
+            page = await fetch_page(page_number)
+            if page is None:
+                return
+            yield page
+            results = search_results(page)
+            page_number += 1
+        return
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def fetch_page_bounded(page_number: int) -> t.Optional[GenericApiResponse]:
+        async with semaphore:
+            return await fetch_page(page_number)
+
+    page_count = math.ceil(results.get('totalResults', 0) / per_page)
+    tasks = [
+        asyncio.create_task(fetch_page_bounded(p)) for p in range(first_page + 1, first_page + page_count)
+    ]
+    try:
+        for task in tasks:
+            if (page := await task) is not None:
+                yield page
+    finally:
+        for task in tasks:
+            task.cancel()
+
+async def iter_destiny_entity_pages(
+    entity_type: str,
+    search_term: str,
+    client: t.Optional[ApiClient] = None,
+    concurrency: int = SEARCH_CONCURRENCY
+    ) -> t.AsyncIterator[GenericApiResponse]:
+    """
+    Yields every result page of an entity search in page order, see
+    :func:`iter_result_pages`.
+    """
+    async def fetch_page(page_number: int) -> GenericApiResponse:
+        return await search_destiny_entities(entity_type, search_term, page_number, client=client)
+
+    async for page in iter_result_pages(fetch_page, 0, concurrency):
+        yield page
+
+async def search_all_destiny_entities(
+    entity_type: str,
+    search_term: str,
+    client: t.Optional[ApiClient] = None,
+    concurrency: int = SEARCH_CONCURRENCY
+    ) -> t.List[t.Dict]:
+    """
+    Returns the results of every page of an entity search, see
+    :func:`iter_destiny_entity_pages`.
+    """
+    entities = []
+    async for page in iter_destiny_entity_pages(entity_type, search_term, client=client, concurrency=concurrency):
+        entities.extend(_search_results(page).get('results') or [])
+    return entities
+
+async def get_platform_memberships(membership_id: str, client: t.Optional[ApiClient] = None) -> PlatformMembership:
+    if client is None:
+        client = get_default_client()
+
     membership_url = url_builder('d2', f'254/Profile/{membership_id}/LinkedProfiles/?getAllMemberships=true')
-    memberships: PlatformMembership = await get_request(membership_url, PlatformMembership)
+    memberships: PlatformMembership = await client.resolver.resolve(
+        'memberships', membership_id, lambda: get_request(membership_url, PlatformMembership, client=client)
+    )
     return memberships
 
-async def get_components(member_id: str, components: t.List[int]) -> D2Profile:
+async def get_profile_components(
+    profile: UserProfile, 
+    components: t.List[int], 
+    client: t.Optional[ApiClient] = None,
+    lazy: bool = False,
+    model: t.Type[AdvancedModel] = D2Profile
+    ) -> D2Profile:
     # https://bungie-net.github.io/#/components/schemas/Destiny.DestinyComponentType
-    user_data = await get_platform_memberships(member_id)
+    components_query = urlencode({'components': ','.join([str(c) for c in components])})
+    component_url = url_builder(
+        'd2', str(profile.membership_type), 'Profile', profile.membership_id, f'?{components_query}'
+    )
+    component_data: D2Profile = await get_request(component_url, model, client=client, lazy=lazy)
+    return component_data
+
+async def get_profiles_components(
+    memberships: PlatformMembership, 
+    components: t.List[int], 
+    client: t.Optional[ApiClient] = None,
+    concurrency: int = PROFILE_CONCURRENCY,
+    lazy: bool = False,
+    model: t.Type[AdvancedModel] = D2Profile
+    ) -> t.List[D2Profile]:
+    """
+    Fetches the requested components for every profile of an already
+    resolved :class:`~.models.PlatformMembership` concurrently. At most
+    `concurrency` profile requests are in flight at once.
+
+    :param model: Model each profile is validated into, e.g. a partial
+        profile of :func:`~.planner.partial_profile_model`.
+    :type model: type
+    :return: One :class:`~.models.D2Profile` per profile, in the same
+        order as :attr:`~.models.PlatformMembership.profiles`.
+    :rtype: list
+
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def fetch_profile(profile: UserProfile) -> D2Profile:
+        async with semaphore:
+            return await get_profile_components(profile, components, client=client, lazy=lazy, model=model)
+
+    profiles = await asyncio.gather(*[fetch_profile(p) for p in memberships.profiles])
+    return list(profiles)
+
+async def get_components(
+    member_id: str, 
+    components: t.List[int], 
+    client: t.Optional[ApiClient] = None,
+    lazy: bool = False,
+    memberships: t.Optional[PlatformMembership] = None
+    ) -> t.List[D2Profile]:
+    """
+    Fetches `components` of every profile of a member. Pass already
+    resolved `memberships` to skip the membership lookup.
+    """
+    user_data = memberships
+    if user_data is None:
+        user_data = await get_platform_memberships(member_id, client=client)
 
     if not user_data:
         logger.error('Could not retrieve user information')
@@ -133,29 +373,24 @@ async def get_components(member_id: str, components: t.List[int]) -> D2Profile:
         logger.error('Could not get user profile information')
         return None
 
-    components_query = urlencode({'components': ','.join([str(c) for c in components])})
-
-    for profile in user_data.profiles:
-        component_url = url_builder('d2', '2', 'Profile', profile.membership_id, f'?{components_query}')
-        component_data: GenericApiResponse = await get_request(component_url)
-    return response_handler(component_data, D2Profile)
+    return await get_profiles_components(user_data, components, client=client, lazy=lazy)
 
-def inventory_file_handler(
+async def inventory_file_handler(
     profile_name: str, 
     inventory: D2Profile, 
-    file_path: t.Union[str, Path, None] = None
+    file_path: t.Union[str, Path, None] = None,
+    file_suffix: str = '.json'
     ) -> t.NoReturn:
-    
+    """
+    Writes one profile inventory to `<profile_name>_inventory<file_suffix>`
+    in `file_path` from a worker thread. The suffix selects the format,
+    e.g. `.msgpack.zst`, see :func:`~.models.serialization.file_format`.
+    """
+    file_name = f'{profile_name}_inventory{file_suffix}'
     match file_path:
         case None:
-            file_name = f'{profile_name}_inventory.json'
-            inventory.to_file(file_name)
-            return
+            await inventory.to_file_async(file_name)
         case Path():
-            file_name = file_path.joinpath(f'{profile_name}_inventory.json')
-            inventory.to_file(file_name)
-            return
+            await inventory.to_file_async(file_path.joinpath(file_name))
         case str():
-            file_name = Path(file_path).joinpath(f'{profile_name}_inventory.json')
-            inventory.to_file(file_name)
-            return
\ No newline at end of file
+            await inventory.to_file_async(Path(file_path).joinpath(file_name))
@@ -0,0 +1,313 @@
+import asyncio
+import json
+import logging
+import shutil
+import sqlite3
+import typing as t
+import zipfile
+from pathlib import Path
+
+from models import *
+from .client import ApiClient, get_default_client
+from .common import *
+from .factory import url_builder
+from .get import get_d2_manifest
+
+
+logger = logging.getLogger()
+
+
+__all__ = ('ManifestDatabase', 'download_manifest', 'sync_manifest', 'world_content_path')
+
+
+"""
+SQLite limits the number of bound parameters in one statement, bulk
+lookups are split into chunks of this size.
+"""
+SQLITE_MAX_VARIABLES = 900
+
+"""
+File in the manifest directory that records the last synced
+manifest version, its content paths and validators.
+"""
+MANIFEST_STATE_FILE = 'manifest_state.json'
+
+
+def world_content_path(directory: t.Union[str, Path], version: str, locale: str) -> Path:
+    return Path(directory).joinpath(version, locale, 'world_content.sqlite3')
+
+
+class ManifestDatabase:
+    """
+    Read-only access to a locally stored Destiny 2 world content
+    database. Every definition table is keyed by the definition hash
+    stored as a signed 32-bit integer primary key, so a lookup is a
+    single indexed read.
+
+    :param path: Path of the extracted SQLite world content file.
+    :type path: str or Path
+    :param version: Manifest version the database belongs to.
+    :type version: str
+
+    """
+
+    def __init__(self, path: t.Union[str, Path], version: t.Optional[str] = None) -> None:
+        self.path = Path(path)
+        self.version = version
+        self._connection: t.Optional[sqlite3.Connection] = None
+        self._key_columns: t.Dict[str, str] = {}
+
+    def __enter__(self) -> 'ManifestDatabase':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        if self._connection is None:
+            self._connection = sqlite3.connect(
+                f'file:{self.path.as_posix()}?mode=ro', uri=True, check_same_thread=False
+            )
+            self._key_columns = {
+                table: self._key_column(table) for (table,) in
+                self._connection.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+            }
+        return self._connection
+
+    @property
+    def tables(self) -> t.List[str]:
+        self.connection
+        return sorted(self._key_columns)
+
+    def _key_column(self, table: str) -> str:
+        columns = [row[1] for row in self._connection.execute(f'PRAGMA table_info("{table}")')]
+        return 'id' if 'id' in columns else 'key'
+
+    def _table(self, entity_type: str) -> t.Tuple[str, str]:
+        self.connection
+        if entity_type not in self._key_columns:
+            raise KeyError(f'Unknown manifest entity type {entity_type}')
+        return entity_type, self._key_columns[entity_type]
+
+    @staticmethod
+    def signed_hash(hash_id: t.Union[str, int]) -> int:
+        """
+        Converts an unsigned definition hash into the signed integer
+        used as the primary key of the world content tables.
+        """
+        hash_id = int(hash_id)
+        return hash_id - (1 << 32) if hash_id >= (1 << 31) else hash_id
+
+    @staticmethod
+    def unsigned_hash(key: int) -> int:
+        return key + (1 << 32) if key < 0 else key
+
+    def _lookup_key(self, key_column: str, hash_id: t.Union[str, int]) -> t.Union[str, int]:
+        return self.signed_hash(hash_id) if key_column == 'id' else str(hash_id)
+
+    def get_definition(self, entity_type: str, hash_id: t.Union[str, int]) -> t.Optional[t.Dict]:
+        """
+        Returns the definition of `hash_id` in the `entity_type` table,
+        e.g. `DestinyInventoryItemDefinition`, or None if it does not
+        exist.
+        """
+        table, key_column = self._table(entity_type)
+        row = self.connection.execute(
+            f'SELECT json FROM "{table}" WHERE {key_column} = ?', (self._lookup_key(key_column, hash_id),)
+        ).fetchone()
+        return json.loads(row[0]) if row is not None else None
+
+    def get_definitions(
+        self,
+        entity_type: str,
+        hash_ids: t.Iterable[t.Union[str, int]]
+        ) -> t.Dict[t.Union[str, int], t.Dict]:
+        """
+        Resolves many hashes of the same `entity_type` with as few
+        queries as possible. Duplicate hashes are looked up once.
+
+        :return: Definitions keyed by their unsigned hash, hashes that
+            do not exist are omitted.
+        :rtype: dict
+
+        """
+        table, key_column = self._table(entity_type)
+        keys = list({self._lookup_key(key_column, h) for h in hash_ids})
+        definitions = {}
+
+        for i in range(0, len(keys), SQLITE_MAX_VARIABLES):
+            chunk = keys[i:i + SQLITE_MAX_VARIABLES]
+            placeholders = ','.join('?' * len(chunk))
+            rows = self.connection.execute(
+                f'SELECT {key_column}, json FROM "{table}" WHERE {key_column} IN ({placeholders})', chunk
+            )
+            for key, definition in rows:
+                if key_column == 'id':
+                    key = self.unsigned_hash(key)
+                definitions[key] = json.loads(definition)
+        return definitions
+
+    def close(self) -> None:
+        if self._connection is not None:
+            self._connection.close()
+        self._connection = None
+
+
+def _extract_content(archive: Path, destination: Path) -> None:
+    with zipfile.ZipFile(archive) as content_zip:
+        member = content_zip.namelist()[0]
+        with content_zip.open(member) as source, open(destination, 'wb') as target:
+            while chunk := source.read(1 << 20):
+                target.write(chunk)
+
+
+async def download_manifest(
+    directory: t.Union[str, Path] = 'manifest',
+    locale: str = MANIFEST_LOCALE,
+    client: t.Optional[ApiClient] = None,
+    manifest: t.Optional[t.Dict] = None
+    ) -> ManifestDatabase:
+    """
+    Downloads the world content database of `locale` for the current
+    manifest version into `directory/<version>/<locale>/`. Nothing is
+    downloaded if that version is already stored locally.
+
+    :param directory: Directory the manifest databases are stored in.
+    :type directory: str or Path
+    :param locale: Locale of the world content, e.g. `en`.
+    :type locale: str
+    :param manifest: Already fetched manifest, fetched from the API if
+        not given.
+    :type manifest: dict
+    :return: Database of the current manifest version.
+    :rtype: :class:`ManifestDatabase`
+
+    """
+    if client is None:
+        client = get_default_client()
+
+    if manifest is None:
+        manifest_data: GenericApiResponse = await get_d2_manifest(client=client)
+        manifest = manifest_data.response
+
+    version = manifest['version']
+    destination = world_content_path(directory, version, locale)
+
+    if not destination.exists():
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        archive = destination.with_suffix('.zip')
+        content_url = ROOT + manifest['mobileWorldContentPaths'][locale]
+        logger.info(f'Downloading {locale} world content for manifest {version}')
+
+        await client.download(content_url, archive)
+        partial = destination.with_suffix('.partial')
+        await asyncio.to_thread(_extract_content, archive, partial)
+        partial.replace(destination)
+        archive.unlink()
+
+    return ManifestDatabase(destination, version)
+
+
+def _read_state(directory: Path) -> t.Dict:
+    state_file = directory.joinpath(MANIFEST_STATE_FILE)
+    if not state_file.exists():
+        return {}
+    with open(state_file) as f:
+        return json.load(f)
+
+
+def _write_state(directory: Path, state: t.Dict) -> None:
+    state_file = directory.joinpath(MANIFEST_STATE_FILE)
+    partial = state_file.with_suffix('.partial')
+    with open(partial, 'w') as f:
+        json.dump(state, f, indent=2)
+    partial.replace(state_file)
+
+
+async def sync_manifest(
+    directory: t.Union[str, Path] = 'manifest',
+    locales: t.Iterable[str] = (MANIFEST_LOCALE,),
+    client: t.Optional[ApiClient] = None
+    ) -> t.Dict[str, ManifestDatabase]:
+    """
+    Brings the local world content databases of `locales` up to date
+    with the current manifest.
+
+    The last synced manifest `version`, the content path of every
+    locale and the `ETag`/`Last-Modified` validators of the manifest
+    response are kept in :data:`MANIFEST_STATE_FILE`. The manifest is
+    requested conditionally with those validators, and a locale is only
+    downloaded again when its content path changed or its database is
+    missing, so a sync with nothing to do costs one small request.
+
+    :param directory: Directory the manifest databases are stored in.
+    :type directory: str or Path
+    :param locales: Locales to keep in sync.
+    :return: Database of every synced locale, empty if the manifest
+        could not be retrieved.
+    :rtype: dict
+
+    """
+    if client is None:
+        client = get_default_client()
+
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    locales = list(locales)
+    state = _read_state(directory)
+
+    conditional_headers = {}
+    if not set(locales).issubset(state.get('paths', {})):
+        # A locale that was never synced needs its path from the full manifest
+        state = {**state, 'etag': None, 'last_modified': None}
+    if (etag := state.get('etag')) is not None:
+        conditional_headers['If-None-Match'] = etag
+    if (last_modified := state.get('last_modified')) is not None:
+        conditional_headers['If-Modified-Since'] = last_modified
+
+    status, headers, body = await client.request_json(url_builder('d2', 'Manifest'), conditional_headers)
+
+    if status == 304:
+        logger.info(f'Manifest {state["version"]} is up to date')
+        manifest = {
+            'version': state['version'], 
+            'mobileWorldContentPaths': state.get('paths', {})
+        }
+    elif body.get('ErrorCode') == 1 and body.get('Response'):
+        manifest = body['Response']
+    else:
+        logger.error(
+            f'Could not retrieve the manifest: {body.get("ErrorStatus")} ({body.get("ErrorCode")}) {body.get("Message")}'
+        )
+        return {}
+
+    stored_paths = state.get('paths', {}) if state.get('version') == manifest['version'] else {}
+    paths = {}
+    databases = {}
+
+    for locale in locales:
+        content_path = manifest['mobileWorldContentPaths'].get(locale)
+        if content_path is None:
+            logger.error(f'Manifest {manifest["version"]} has no world content for locale {locale}')
+            continue
+
+        destination = world_content_path(directory, manifest['version'], locale)
+        if stored_paths.get(locale) != content_path and destination.exists():
+            logger.info(f'World content path of {locale} changed, refreshing')
+            destination.unlink()
+
+        databases[locale] = await download_manifest(directory, locale, client, manifest)
+        paths[locale] = content_path
+
+    if (previous := state.get('version')) is not None and previous != manifest['version']:
+        logger.info(f'Removing world content of superseded manifest {previous}')
+        shutil.rmtree(directory.joinpath(previous), ignore_errors=True)
+
+    _write_state(directory, {
+        'version': manifest['version'],
+        'etag': headers.get('ETag', state.get('etag') if status == 304 else None),
+        'last_modified': headers.get('Last-Modified', state.get('last_modified') if status == 304 else None),
+        'paths': {**stored_paths, **paths},
+    })
+    return databases
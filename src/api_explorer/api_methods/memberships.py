@@ -0,0 +1,125 @@
+import logging
+import typing as t
+from collections import Counter, OrderedDict
+from time import monotonic
+
+from models import GenericApiResponse
+from .coalesce import Coalescer
+
+
+logger = logging.getLogger()
+
+
+__all__ = ('MembershipResolver', 'MEMBERSHIP_TTL')
+
+
+"""
+Seconds a resolved user or set of platform memberships is reused
+before it is looked up again.
+"""
+MEMBERSHIP_TTL = 10 * 60
+
+
+class MembershipResolver:
+    """
+    Memoizes the parsed user and platform membership lookups of each
+    member ID for `ttl` seconds, so resolving the same member for
+    several operations sends one `GetBungieNetUserById` and one
+    `LinkedProfiles` request. Concurrent lookups of the same member
+    share a single in-flight request. Failed lookups, which resolve to
+    None or to the :class:`~.models.GenericApiResponse` of an error,
+    are shared with the lookups waiting on them but not remembered.
+
+    Every :class:`~.client.ApiClient` owns one, see
+    :func:`~.get.get_user_data` and :func:`~.get.get_platform_memberships`.
+
+    :param ttl: Seconds a lookup is remembered for.
+    :type ttl: float
+    :param max_entries: Maximum number of lookups remembered.
+    :type max_entries: int
+
+    """
+
+    def __init__(self, ttl: float = MEMBERSHIP_TTL, max_entries: int = 4096) -> None:
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: t.OrderedDict[t.Tuple[str, str], t.Tuple[float, t.Any]] = OrderedDict()
+        self._in_flight = Coalescer()
+
+        self.hits: t.Counter[str] = Counter()
+        self.misses: t.Counter[str] = Counter()
+        self.coalesced: t.Counter[str] = Counter()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def seed(self, kind: str, member_id: str, value: t.Any) -> None:
+        """
+        Remembers an already resolved lookup, e.g. a
+        :class:`~.models.PlatformMembership` obtained elsewhere.
+        """
+        key = (kind, str(member_id))
+        self._entries[key] = (monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get(self, kind: str, member_id: str) -> t.Optional[t.Any]:
+        key = (kind, str(member_id))
+        if (entry := self._entries.get(key)) is None:
+            return None
+        expires, value = entry
+        if expires <= monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def resolve(self, kind: str, member_id: str, loader: t.Callable[[], t.Awaitable[t.Any]]) -> t.Any:
+        """
+        Returns the remembered `kind` lookup of `member_id` or awaits
+        `loader` to perform it.
+
+        :param kind: Kind of lookup, e.g. `user` or `memberships`.
+        :type kind: str
+
+        """
+        if (value := self.get(kind, member_id)) is not None:
+            self.hits[kind] += 1
+            return value
+
+        async def load() -> t.Any:
+            self.misses[kind] += 1
+            value = await loader()
+            if value is not None and not isinstance(value, GenericApiResponse):
+                self.seed(kind, member_id, value)
+            return value
+
+        value, coalesced = await self._in_flight.run((kind, str(member_id)), load)
+        if coalesced:
+            self.coalesced[kind] += 1
+        return value
+
+    def invalidate(self, member_id: t.Optional[str] = None) -> None:
+        """
+        Forgets every lookup of `member_id`, or every lookup if None.
+        """
+        if member_id is None:
+            self._entries.clear()
+            return
+        for key in [k for k in self._entries if k[1] == str(member_id)]:
+            del self._entries[key]
+
+    @property
+    def stats(self) -> t.Dict[str, t.Dict[str, int]]:
+        """
+        Hits, misses and coalesced lookups per kind.
+        """
+        kinds = set(self.hits) | set(self.misses) | set(self.coalesced)
+        return {
+            kind: {
+                'hits': self.hits[kind],
+                'misses': self.misses[kind],
+                'coalesced': self.coalesced[kind],
+            } for kind in sorted(kinds)
+        }
@@ -0,0 +1,211 @@
+import bisect
+import logging
+import typing as t
+from collections import defaultdict
+from time import perf_counter
+
+from .factory import endpoint_name
+
+if t.TYPE_CHECKING:
+    from aiohttp import TraceConfig
+
+
+logger = logging.getLogger()
+
+
+__all__ = ('Histogram', 'Metrics', 'LATENCY_BUCKETS', 'SIZE_BUCKETS')
+
+
+"""
+Upper bounds of the histogram buckets of durations, in seconds.
+"""
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+"""
+Upper bounds of the histogram buckets of response sizes, in bytes.
+"""
+SIZE_BUCKETS = (1 << 10, 1 << 12, 1 << 14, 1 << 16, 1 << 18, 1 << 20, 1 << 22, 1 << 24)
+
+"""
+Histograms recorded by an instrumented client, with their unit and
+description. Every histogram is labelled with the logical endpoint of
+:func:`~.factory.endpoint_name`.
+"""
+HISTOGRAMS = {
+    'dns_seconds': (LATENCY_BUCKETS, 'Time resolving the host of a request'),
+    'connect_seconds': (LATENCY_BUCKETS, 'Time opening a new pooled connection'),
+    'ttfb_seconds': (LATENCY_BUCKETS, 'Time until the response headers arrived'),
+    'request_seconds': (LATENCY_BUCKETS, 'Time until the response body was read and decoded'),
+    'decode_seconds': (LATENCY_BUCKETS, 'Time decoding the JSON body'),
+    'validate_seconds': (LATENCY_BUCKETS, 'Time validating the body into models'),
+    'rate_limit_wait_seconds': (LATENCY_BUCKETS, 'Time waiting on the rate limiter'),
+    'response_bytes': (SIZE_BUCKETS, 'Size of the response body'),
+}
+
+"""
+Counters recorded by an instrumented client, labelled like
+:data:`HISTOGRAMS`.
+"""
+COUNTERS = {
+    'retries': 'Attempts retried after a throttled or rejected response',
+    'cache_hits': 'Requests answered from memory or disk by the response cache',
+    'cache_misses': 'Requests the response cache sent to the network',
+    'coalesced': 'Requests that waited on an identical request already in flight',
+}
+
+METRIC_PREFIX = 'destiny_api_'
+
+
+class Histogram:
+    """
+    Cumulative bucket histogram in the style of a Prometheus histogram.
+
+    :param buckets: Sorted upper bounds of the buckets.
+    :type buckets: tuple
+
+    """
+
+    __slots__ = ('buckets', 'counts', 'count', 'sum')
+
+    def __init__(self, buckets: t.Sequence[float] = LATENCY_BUCKETS) -> None:
+        self.buckets = tuple(buckets)
+        # The last count is the implicit +Inf bucket
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> float:
+        """
+        Upper bound of the bucket holding the `q` quantile, or the
+        largest bound if it falls in the overflow bucket.
+        """
+        if self.count == 0:
+            return 0.0
+        rank, seen = q * self.count, 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return self.buckets[-1]
+
+    @property
+    def mean(self) -> float:
+        return self.sum / self.count if self.count else 0.0
+
+
+class Metrics:
+    """
+    In-process registry of the request histograms and counters of an
+    :class:`~.client.ApiClient`, labelled by logical endpoint. Attach it
+    with `ApiClient(metrics=Metrics())`; the client then records the
+    :data:`HISTOGRAMS` and :data:`COUNTERS` of every request.
+    """
+
+    def __init__(self) -> None:
+        self.histograms: t.Dict[str, t.Dict[str, Histogram]] = {
+            name: defaultdict(lambda buckets=buckets: Histogram(buckets)) for name, (buckets, _) in HISTOGRAMS.items()
+        }
+        self.counters: t.Dict[str, t.Dict[str, int]] = {name: defaultdict(int) for name in COUNTERS}
+
+    def observe(self, name: str, endpoint: str, value: float) -> None:
+        self.histograms[name][endpoint].observe(value)
+
+    def increment(self, name: str, endpoint: str, amount: int = 1) -> None:
+        self.counters[name][endpoint] += amount
+
+    def reset(self) -> None:
+        for histograms in self.histograms.values():
+            histograms.clear()
+        for counters in self.counters.values():
+            counters.clear()
+
+    def trace_config(self) -> 'TraceConfig':
+        """
+        Builds the :class:`aiohttp.TraceConfig` recording the DNS,
+        connection and time to first byte of every request of a session.
+        """
+        from aiohttp import TraceConfig
+
+        async def on_request_start(session, context, params) -> None:
+            context.endpoint = endpoint_name(str(params.url))
+            context.start = perf_counter()
+
+        async def on_dns_resolvehost_start(session, context, params) -> None:
+            context.dns_start = perf_counter()
+
+        async def on_dns_resolvehost_end(session, context, params) -> None:
+            self.observe('dns_seconds', context.endpoint, perf_counter() - context.dns_start)
+
+        async def on_connection_create_start(session, context, params) -> None:
+            context.connect_start = perf_counter()
+
+        async def on_connection_create_end(session, context, params) -> None:
+            self.observe('connect_seconds', context.endpoint, perf_counter() - context.connect_start)
+
+        async def on_request_end(session, context, params) -> None:
+            self.observe('ttfb_seconds', context.endpoint, perf_counter() - context.start)
+
+        trace_config = TraceConfig()
+        trace_config.on_request_start.append(on_request_start)
+        trace_config.on_dns_resolvehost_start.append(on_dns_resolvehost_start)
+        trace_config.on_dns_resolvehost_end.append(on_dns_resolvehost_end)
+        trace_config.on_connection_create_start.append(on_connection_create_start)
+        trace_config.on_connection_create_end.append(on_connection_create_end)
+        trace_config.on_request_end.append(on_request_end)
+        return trace_config
+
+    def prometheus(self) -> str:
+        """
+        Renders every metric in the Prometheus text exposition format.
+        """
+        lines = []
+        for name, (_, description) in HISTOGRAMS.items():
+            metric = f'{METRIC_PREFIX}{name}'
+            lines.append(f'# HELP {metric} {description}')
+            lines.append(f'# TYPE {metric} histogram')
+            for endpoint, histogram in sorted(self.histograms[name].items()):
+                cumulative = 0
+                for bound, count in zip((*histogram.buckets, '+Inf'), histogram.counts):
+                    cumulative += count
+                    lines.append(f'{metric}_bucket{{endpoint="{endpoint}",le="{bound}"}} {cumulative}')
+                lines.append(f'{metric}_sum{{endpoint="{endpoint}"}} {histogram.sum}')
+                lines.append(f'{metric}_count{{endpoint="{endpoint}"}} {histogram.count}')
+
+        for name, description in COUNTERS.items():
+            metric = f'{METRIC_PREFIX}{name}_total'
+            lines.append(f'# HELP {metric} {description}')
+            lines.append(f'# TYPE {metric} counter')
+            for endpoint, value in sorted(self.counters[name].items()):
+                lines.append(f'{metric}{{endpoint="{endpoint}"}} {value}')
+        return '\n'.join(lines) + '\n'
+
+    def summary(self) -> str:
+        """
+        Renders a table of the request count, latency quantiles and
+        bytes received per endpoint, for printing at the end of a run.
+        """
+        requests = self.histograms['request_seconds']
+        sizes = self.histograms['response_bytes']
+        validation = self.histograms['validate_seconds']
+        endpoints = sorted(set(requests) | set(self.counters['cache_hits']) | set(self.counters['coalesced']))
+
+        lines = [
+            f'{"endpoint":<18} {"requests":>8} {"cached":>6} {"shared":>6} {"retries":>7} '
+            f'{"mean":>8} {"p50<=":>7} {"p95<=":>7} {"validate":>8} {"bytes":>10}'
+        ]
+        for endpoint in endpoints:
+            latency = requests.get(endpoint) or Histogram()
+            lines.append(
+                f'{endpoint:<18} {latency.count:>8} {self.counters["cache_hits"].get(endpoint, 0):>6} '
+                f'{self.counters["coalesced"].get(endpoint, 0):>6} '
+                f'{self.counters["retries"].get(endpoint, 0):>7} {latency.mean:>8.3f} '
+                f'{latency.quantile(0.5):>7} {latency.quantile(0.95):>7} '
+                f'{(validation.get(endpoint) or Histogram()).mean:>8.3f} '
+                f'{int((sizes.get(endpoint) or Histogram()).sum):>10}'
+            )
+        return '\n'.join(lines)
@@ -0,0 +1,129 @@
+import logging
+import typing as t
+from functools import lru_cache
+from pydantic import create_model
+
+from models import *
+from models.generic import camel_to_snake
+from .client import ApiClient
+from .common import *
+from .get import get_platform_memberships, get_profiles_components
+
+
+logger = logging.getLogger()
+
+
+__all__ = ('ProfileRequestPlan', 'PartialProfile', 'PROFILE_FIELD_COMPONENTS', 'plan_profile_request',
+           'partial_profile_model', 'get_profile_fields')
+
+
+"""
+Components of the `GetProfile` request that fill each field of
+:class:`~.models.D2Profile`.
+"""
+PROFILE_FIELD_COMPONENTS = {
+    'characters': (Component.Characters,),
+    'profile': (Component.Profiles,),
+    'equipment': (Component.CharacterEquipment,),
+    'inventory': (Component.CharacterInventories,),
+    'plugSet': (Component.ItemSockets,),
+    'itemComponents': (Component.ItemInstances, Component.ItemSockets, Component.ItemReusablePlugs),
+    'profileCurrencies': (Component.ProfileCurrencies,),
+    'profileInventory': (Component.ProfileInventories,),
+    'profilePlugSets': (Component.ItemSockets,),
+}
+
+
+class ProfileRequestPlan(t.NamedTuple):
+    """
+    The fields of :class:`~.models.D2Profile` a caller needs, the
+    components requested to fill them and the partial model they are
+    validated into.
+    """
+    fields: t.FrozenSet[str]
+    components: t.List[int]
+    model: t.Type['PartialProfile']
+
+
+class PartialProfile(AdvancedModel):
+    """
+    Base of the models of :func:`partial_profile_model`.
+    """
+
+    class Config:
+        extra = 'ignore'
+
+    iter_items = D2Profile.iter_items
+
+
+def _field_name(name: str) -> str:
+    if name in PROFILE_FIELD_COMPONENTS:
+        return name
+    for field_name in PROFILE_FIELD_COMPONENTS:
+        if camel_to_snake(field_name) == name:
+            return field_name
+    raise ValueError(f'D2Profile has no field {name}')
+
+
+@lru_cache(maxsize=None)
+def partial_profile_model(fields: t.FrozenSet[str]) -> t.Type[PartialProfile]:
+    """
+    Builds a model holding only `fields` of :class:`~.models.D2Profile`,
+    with the same types and required fields. Sections of the response
+    outside `fields` are dropped without being validated. Models are
+    cached per set of fields.
+    """
+    definitions = {}
+    for name in sorted(fields):
+        field = D2Profile.__fields__[name]
+        definitions[name] = (field.outer_type_, ... if field.required else None)
+
+    return create_model(
+        f'D2Profile[{",".join(sorted(fields))}]', __base__=PartialProfile, __module__=__name__, **definitions
+    )
+
+
+def plan_profile_request(*field_sets: t.Iterable[str]) -> ProfileRequestPlan:
+    """
+    Merges the fields of :class:`~.models.D2Profile` needed by one or
+    more callers into a single request plan with the fewest components.
+    Field names may be given in camelCase or snake_case.
+
+    :raises ValueError: If a name is not a field of the profile.
+
+    """
+    fields = frozenset(_field_name(name) for field_set in field_sets for name in field_set)
+    if not fields:
+        raise ValueError('At least one D2Profile field is required')
+
+    components = sorted({c.value for name in fields for c in PROFILE_FIELD_COMPONENTS[name]})
+    return ProfileRequestPlan(fields, components, partial_profile_model(fields))
+
+
+async def get_profile_fields(
+    member_id: str,
+    fields: t.Iterable[str],
+    client: t.Optional[ApiClient] = None,
+    concurrency: int = PROFILE_CONCURRENCY,
+    memberships: t.Optional[PlatformMembership] = None
+    ) -> t.List[PartialProfile]:
+    """
+    Fetches only the components needed for `fields` of every profile
+    of a member and validates them into a partial profile, see
+    :func:`plan_profile_request`.
+
+    :return: One partial profile per profile of the member.
+    :rtype: list
+
+    """
+    plan = plan_profile_request(fields)
+
+    if memberships is None:
+        memberships = await get_platform_memberships(member_id, client=client)
+    if not memberships or not memberships.profiles:
+        logger.error('Could not get user profile information')
+        return []
+
+    return await get_profiles_components(
+        memberships, plan.components, client=client, concurrency=concurrency, model=plan.model
+    )
@@ -1,19 +1,24 @@
 import typing as t
-from aiohttp import ClientSession
 from aiohttp.client_exceptions import ClientResponseError
 
-from .models import *
+from models import *
+from .client import ApiClient, get_default_client
 from .common import *
 from .factory import url_builder
 
 
-async def post_request(url: str) -> t.Union[GenericApiResponse, None]:
+async def post_request(
+    url: str, 
+    data: t.Any = None, 
+    client: t.Optional[ApiClient] = None
+    ) -> t.Union[GenericApiResponse, None]:
+    if client is None:
+        client = get_default_client()
+
     try:
-        async with ClientSession() as session:
-            async with session.get(url, headers=HEADERS) as r:
-                json_res = await r.json()
-                data = GenericApiResponse.parse_obj(json_res)
-                return data
+        json_res = await client.post_json(url, data)
+        data = GenericApiResponse.parse_obj(json_res)
+        return data
     except ClientResponseError as e:
         print(e)
         return None
@@ -0,0 +1,138 @@
+import hashlib
+import json
+import logging
+import typing as t
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from .common import *
+from .factory import endpoint_name
+
+
+if t.TYPE_CHECKING:
+    from aiohttp import web
+
+
+logger = logging.getLogger()
+
+
+__all__ = ('ReplayStore', 'recording_app', 'serve_recordings')
+
+
+"""
+Responses bundled in the `resources` directory, by logical endpoint.
+They hold the bare `Response` payload of the endpoint.
+"""
+BUNDLED_RESOURCES = {
+    'settings': 'bnet_settings.json',
+    'manifest': 'd2-manifest.json',
+    'stats_definition': 'd2_statistics_info.json',
+}
+
+
+def request_key(url: str) -> str:
+    """
+    Path and query of `url`, so a recording made against the live API
+    also matches the same request sent to a local stub server.
+    """
+    parts = urlsplit(url)
+    return f'{parts.path}?{parts.query}' if parts.query else parts.path
+
+
+def envelope(response: t.Any) -> t.Dict:
+    return {
+        'Response': response,
+        'ErrorCode': 1,
+        'ThrottleSeconds': 0,
+        'ErrorStatus': 'Success',
+        'Message': 'Ok',
+    }
+
+
+class ReplayStore:
+    """
+    Directory of recorded API responses. Each response is stored as
+    `<endpoint>/<hash of the request path and query>.json`.
+
+    Requests that were never recorded fall back to the snapshots
+    bundled in `resources/` when `bundled` is set.
+
+    :param directory: Directory the responses are read from and
+        recorded to.
+    :type directory: str or Path
+    :param bundled: Serve the bundled resources for unrecorded requests.
+    :type bundled: bool
+
+    """
+
+    def __init__(self, directory: t.Union[str, Path], bundled: bool = True) -> None:
+        self.directory = Path(directory)
+        self.bundled = bundled
+
+    def path_for(self, url: str) -> Path:
+        digest = hashlib.sha1(request_key(url).encode()).hexdigest()
+        return self.directory.joinpath(endpoint_name(url), f'{digest}.json')
+
+    def load(self, url: str) -> t.Optional[t.Dict]:
+        """
+        Returns the recorded response body of `url`, or None if it was
+        never recorded.
+        """
+        if (path := self.path_for(url)).exists():
+            with open(path) as f:
+                return json.load(f)['body']
+
+        if self.bundled and (resource := BUNDLED_RESOURCES.get(endpoint_name(url))) is not None:
+            with open(RESOURCES.joinpath(resource)) as f:
+                return envelope(json.load(f))
+        return None
+
+    def save(self, url: str, body: t.Dict) -> Path:
+        path = self.path_for(url)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        partial = path.with_suffix('.partial')
+        with open(partial, 'w') as f:
+            json.dump({'url': request_key(url), 'body': body}, f)
+        partial.replace(path)
+        return path
+
+
+def recording_app(store: ReplayStore) -> 'web.Application':
+    """
+    Builds an :mod:`aiohttp` application answering every `GET` request
+    with its recorded response, or a 404 if there is none.
+    """
+    from aiohttp import web
+
+    async def handle(request: 'web.Request') -> 'web.Response':
+        body = store.load(str(request.rel_url))
+        if body is None:
+            logger.warning(f'No recorded response for {request.rel_url}')
+            return web.json_response({'ErrorCode': 0, 'ErrorStatus': 'NotRecorded'}, status=404)
+        return web.json_response(body)
+
+    app = web.Application()
+    app.router.add_get('/{path:.*}', handle)
+    return app
+
+
+async def serve_recordings(
+    directory: t.Union[str, Path],
+    host: str = '127.0.0.1',
+    port: int = 8080
+    ) -> 'web.AppRunner':
+    """
+    Starts a local HTTP stub server for the recordings in `directory`.
+    Point an :class:`~.client.ApiClient` at it with `base_url`.
+
+    :return: Runner of the started server, clean it up to stop it.
+    :rtype: :class:`aiohttp.web.AppRunner`
+
+    """
+    from aiohttp import web
+
+    runner = web.AppRunner(recording_app(ReplayStore(directory)))
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    logger.info(f'Serving recordings of {directory} on http://{host}:{port}')
+    return runner
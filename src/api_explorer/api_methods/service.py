@@ -0,0 +1,186 @@
+import json
+import logging
+import typing as t
+from pathlib import Path
+from pydantic.json import pydantic_encoder
+
+from .client import ApiClient, get_default_client
+from .get import *
+from .manifest import ManifestDatabase
+
+if t.TYPE_CHECKING:
+    from aiohttp import web
+
+
+logger = logging.getLogger()
+
+
+__all__ = ('SERVICE_PORT', 'service_app', 'serve_service')
+
+
+"""
+Port the request service listens on when none is given.
+"""
+SERVICE_PORT = 8787
+
+
+def _json_response(body: t.Any, status: int = 200) -> 'web.Response':
+    from aiohttp import web
+    return web.Response(
+        text=json.dumps(body, default=pydantic_encoder), status=status, content_type='application/json'
+    )
+
+
+def _error(status: int, error_status: str, message: str) -> 'web.Response':
+    return _json_response({'ErrorCode': 0, 'ErrorStatus': error_status, 'Message': message}, status=status)
+
+
+def service_app(
+    client: t.Optional[ApiClient] = None,
+    manifest: t.Optional[ManifestDatabase] = None
+    ) -> 'web.Application':
+    """
+    Builds an :mod:`aiohttp` application exposing the request
+    functions of :mod:`.get` as `GET` routes answering with JSON:
+
+    ========================================  =====================================
+    `/manifest`                               :func:`get_d2_manifest`
+    `/manifest/{entity_type}/{hash_id}`       :func:`get_entity_manifest`
+    `/settings`                               :func:`get_bnet_settings`
+    `/stats-definition`                       :func:`get_historical_stats_definition`
+    `/entities/{entity_type}/{search_term}`   :func:`search_destiny_entities`, `?page=`,
+                                              every result with `?page=all`
+    `/users/{member_id}`                      :func:`get_user_data`
+    `/users/{member_id}/names`                :func:`get_cleaned_user_names`
+    `/users/{member_id}/memberships`          :func:`get_platform_memberships`
+    `/users/{member_id}/components`           :func:`get_components`, `?components=100,200`
+    `/users/{member_id}/inventory`            :func:`get_user_inventory`
+    `/status`                                 Cache, rate limiter and membership statistics
+    `/metrics`                                Request metrics in the Prometheus text format
+    ========================================  =====================================
+
+    Every request shares `client`, so its connection pool, response
+    cache and rate limiter stay warm between calls. Entity definitions
+    are read from `manifest` when one is given.
+
+    :param client: Client the requests are sent with, defaults to the
+        default client.
+    :type client: :class:`~.client.ApiClient`
+    :param manifest: Local manifest database kept open by the service.
+    :type manifest: :class:`~.manifest.ManifestDatabase`
+
+    """
+    from aiohttp import web
+
+    if client is None:
+        client = get_default_client()
+
+    async def call(request: 'web.Request', function: t.Callable, *args, **kwargs) -> 'web.Response':
+        try:
+            result = await function(*args, client=client, **kwargs)
+        except Exception as e:
+            logger.exception(f'Request {request.rel_url} failed')
+            return _error(500, 'ServiceError', str(e))
+        if result is None:
+            return _error(502, 'UpstreamError', f'No response for {request.rel_url}')
+        return _json_response(result)
+
+    async def manifest_handler(request: 'web.Request') -> 'web.Response':
+        return await call(request, get_d2_manifest)
+
+    async def entity_manifest_handler(request: 'web.Request') -> 'web.Response':
+        info = request.match_info
+        return await call(request, get_entity_manifest, info['entity_type'], info['hash_id'], manifest=manifest)
+
+    async def settings_handler(request: 'web.Request') -> 'web.Response':
+        return await call(request, get_bnet_settings)
+
+    async def stats_definition_handler(request: 'web.Request') -> 'web.Response':
+        return await call(request, get_historical_stats_definition)
+
+    async def entities_handler(request: 'web.Request') -> 'web.Response':
+        info = request.match_info
+        if request.query.get('page') == 'all':
+            return await call(request, search_all_destiny_entities, info['entity_type'], info['search_term'])
+        try:
+            page = int(request.query.get('page', 0))
+        except ValueError:
+            return _error(400, 'InvalidParameters', 'page must be an integer or all')
+        return await call(request, search_destiny_entities, info['entity_type'], info['search_term'], page)
+
+    async def user_handler(request: 'web.Request') -> 'web.Response':
+        return await call(request, get_user_data, request.match_info['member_id'])
+
+    async def user_names_handler(request: 'web.Request') -> 'web.Response':
+        return await call(request, get_cleaned_user_names, request.match_info['member_id'])
+
+    async def memberships_handler(request: 'web.Request') -> 'web.Response':
+        return await call(request, get_platform_memberships, request.match_info['member_id'])
+
+    async def components_handler(request: 'web.Request') -> 'web.Response':
+        try:
+            components = [int(c) for c in request.query.get('components', '').split(',') if c]
+        except ValueError:
+            return _error(400, 'InvalidParameters', 'components must be a comma separated list of integers')
+        if not components:
+            return _error(400, 'InvalidParameters', 'Component ID(s) required')
+        return await call(request, get_components, request.match_info['member_id'], components)
+
+    async def inventory_handler(request: 'web.Request') -> 'web.Response':
+        return await call(request, get_user_inventory, request.match_info['member_id'])
+
+    async def metrics_handler(request: 'web.Request') -> 'web.Response':
+        if client.metrics is None:
+            return _error(404, 'MetricsDisabled', 'The client of the service records no metrics')
+        return web.Response(text=client.metrics.prometheus(), content_type='text/plain')
+
+    async def status_handler(request: 'web.Request') -> 'web.Response':
+        return _json_response({
+            'cache': client.cache.stats if client.cache is not None else None,
+            'rate_limiter': client.rate_limiter.stats if client.rate_limiter is not None else None,
+            'memberships': client.resolver.stats,
+            'manifest': str(manifest.path) if manifest is not None else None,
+        })
+
+    app = web.Application()
+    app.router.add_get('/manifest', manifest_handler)
+    app.router.add_get('/manifest/{entity_type}/{hash_id}', entity_manifest_handler)
+    app.router.add_get('/settings', settings_handler)
+    app.router.add_get('/stats-definition', stats_definition_handler)
+    app.router.add_get('/entities/{entity_type}/{search_term}', entities_handler)
+    app.router.add_get('/users/{member_id}', user_handler)
+    app.router.add_get('/users/{member_id}/names', user_names_handler)
+    app.router.add_get('/users/{member_id}/memberships', memberships_handler)
+    app.router.add_get('/users/{member_id}/components', components_handler)
+    app.router.add_get('/users/{member_id}/inventory', inventory_handler)
+    app.router.add_get('/status', status_handler)
+    app.router.add_get('/metrics', metrics_handler)
+    return app
+
+
+async def serve_service(
+    host: str = '127.0.0.1',
+    port: int = SERVICE_PORT,
+    path: t.Union[str, Path, None] = None,
+    client: t.Optional[ApiClient] = None,
+    manifest: t.Optional[ManifestDatabase] = None
+    ) -> 'web.AppRunner':
+    """
+    Starts the request service of :func:`service_app` on `host` and
+    `port`, or on the Unix socket `path` if one is given.
+
+    :return: Runner of the started service, clean it up to stop it.
+    :rtype: :class:`aiohttp.web.AppRunner`
+
+    """
+    from aiohttp import web
+
+    runner = web.AppRunner(service_app(client, manifest))
+    await runner.setup()
+    if path is not None:
+        await web.UnixSite(runner, str(path)).start()
+        logger.info(f'Serving requests on unix:{path}')
+    else:
+        await web.TCPSite(runner, host, port).start()
+        logger.info(f'Serving requests on http://{host}:{port}')
+    return runner
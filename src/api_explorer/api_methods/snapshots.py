@@ -0,0 +1,252 @@
+import asyncio
+import json
+import logging
+import typing as t
+from pathlib import Path
+from time import time
+
+from models import *
+
+
+logger = logging.getLogger()
+
+
+__all__ = ('ItemChange', 'SnapshotStore', 'snapshot_items', 'diff_snapshots', 'apply_changes',
+           'SNAPSHOT_COMPACT_EVERY')
+
+
+"""
+Number of deltas appended to a snapshot before it is compacted
+into a new base snapshot.
+"""
+SNAPSHOT_COMPACT_EVERY = 100
+
+"""
+Fields kept per item in a snapshot. A change of `owner`, `section`,
+`bucketHash` or `location` is reported as a move, any other field
+as a change.
+"""
+SNAPSHOT_FIELDS = ('owner', 'section', 'itemHash', 'bucketHash', 'location', 'quantity', 'state')
+MOVE_FIELDS = ('owner', 'section', 'bucketHash', 'location')
+
+SNAPSHOT_FILE = 'snapshot.json'
+DELTAS_FILE = 'deltas.jsonl'
+
+
+class ItemChange(t.NamedTuple):
+    """
+    Difference of one item between two snapshots. `kind` is one of
+    `added`, `removed`, `moved` or `changed`, `before` and `after` hold
+    the snapshot fields of the item on either side, or None.
+    """
+    kind: str
+    key: str
+    before: t.Optional[t.Dict]
+    after: t.Optional[t.Dict]
+
+    def dict(self) -> t.Dict:
+        return self._asdict()
+
+
+def item_key(owner: str, section: str, item: t.Union[InventoryItem, D2Currency]) -> str:
+    """
+    Key of an item in a snapshot, its `itemInstanceId` or, for stacks
+    without an instance, the item hash within its owner and bucket.
+    """
+    if instance_id := getattr(item, 'item_instance_id', None):
+        return str(instance_id)
+    return f'{item.item_hash}@{owner}/{section}/{item.bucket_hash}'
+
+
+def snapshot_items(profile: D2Profile) -> t.Dict[str, t.Dict]:
+    """
+    Reduces a profile to the :data:`SNAPSHOT_FIELDS` of every item it
+    holds, keyed by :func:`item_key`. Stacks of the same item without
+    an instance in one bucket are merged.
+    """
+    items = {}
+    for owner, section, item in profile.iter_items():
+        key = item_key(owner, section, item)
+        if (existing := items.get(key)) is not None:
+            existing['quantity'] += item.quantity
+            continue
+        items[key] = {
+            'owner': owner,
+            'section': section,
+            'itemHash': str(item.item_hash),
+            'bucketHash': str(item.bucket_hash),
+            'location': item.location,
+            'quantity': item.quantity,
+            'state': item.state,
+        }
+    return items
+
+
+def diff_snapshots(previous: t.Dict[str, t.Dict], current: t.Dict[str, t.Dict]) -> t.List[ItemChange]:
+    """
+    Lists the items added, removed, moved or changed between two
+    snapshots of :func:`snapshot_items`.
+    """
+    changes = []
+    for key, after in current.items():
+        if (before := previous.get(key)) is None:
+            changes.append(ItemChange('added', key, None, after))
+        elif before != after:
+            moved = any(before.get(f) != after.get(f) for f in MOVE_FIELDS)
+            changes.append(ItemChange('moved' if moved else 'changed', key, before, after))
+    for key, before in previous.items():
+        if key not in current:
+            changes.append(ItemChange('removed', key, before, None))
+    return changes
+
+
+def apply_changes(snapshot: t.Dict[str, t.Dict], changes: t.Iterable[t.Union[ItemChange, t.Dict]]) -> None:
+    """
+    Applies changes of :func:`diff_snapshots` to `snapshot` in place.
+    """
+    for change in changes:
+        if isinstance(change, dict):
+            change = ItemChange(**change)
+        if change.after is None:
+            snapshot.pop(change.key, None)
+        else:
+            snapshot[change.key] = change.after
+
+
+class SnapshotStore:
+    """
+    Stores successive inventory snapshots of profiles as a base
+    snapshot plus an append-only log of the item changes since, so a
+    poll that finds few changes writes a few lines instead of the whole
+    inventory.
+
+    Each profile gets a directory holding `snapshot.json` and
+    `deltas.jsonl`, one line per update with its time and changes. The
+    log is folded into a new base snapshot every `compact_every`
+    updates, or once it grows larger than the base.
+
+    :param directory: Directory the snapshots are stored in.
+    :type directory: str or Path
+    :param compact_every: Number of updates between compactions.
+    :type compact_every: int
+
+    """
+
+    def __init__(self, directory: t.Union[str, Path], compact_every: int = SNAPSHOT_COMPACT_EVERY) -> None:
+        self.directory = Path(directory)
+        self.compact_every = compact_every
+        self._snapshots: t.Dict[str, t.Dict[str, t.Dict]] = {}
+        self._delta_counts: t.Dict[str, int] = {}
+        self._locks: t.Dict[str, asyncio.Lock] = {}
+
+    def path_for(self, profile_id: str) -> Path:
+        return self.directory.joinpath(str(profile_id))
+
+    def _load(self, profile_id: str) -> t.Dict[str, t.Dict]:
+        if (snapshot := self._snapshots.get(profile_id)) is not None:
+            return snapshot
+
+        path = self.path_for(profile_id)
+        snapshot, count = {}, 0
+        if (base := path.joinpath(SNAPSHOT_FILE)).exists():
+            with open(base) as f:
+                snapshot = json.load(f)['items']
+        for _, changes in self._read_deltas(path):
+            apply_changes(snapshot, changes)
+            count += 1
+
+        self._snapshots[profile_id] = snapshot
+        self._delta_counts[profile_id] = count
+        return snapshot
+
+    @staticmethod
+    def _read_deltas(path: Path) -> t.Iterator[t.Tuple[float, t.List[ItemChange]]]:
+        if not (deltas := path.joinpath(DELTAS_FILE)).exists():
+            return
+        with open(deltas) as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # A torn last line of an interrupted write
+                    logger.warning(f'Skipping unreadable delta in {deltas}')
+                    continue
+                yield record['time'], [ItemChange(**c) for c in record['changes']]
+
+    def _compact(self, profile_id: str) -> None:
+        path = self.path_for(profile_id)
+        path.mkdir(parents=True, exist_ok=True)
+        partial = path.joinpath(f'{SNAPSHOT_FILE}.partial')
+        with open(partial, 'w') as f:
+            json.dump({'time': time(), 'items': self._load(profile_id)}, f)
+        partial.replace(path.joinpath(SNAPSHOT_FILE))
+        path.joinpath(DELTAS_FILE).unlink(missing_ok=True)
+        self._delta_counts[profile_id] = 0
+
+    def _append(self, profile_id: str, changes: t.List[ItemChange]) -> None:
+        path = self.path_for(profile_id)
+        path.mkdir(parents=True, exist_ok=True)
+        deltas = path.joinpath(DELTAS_FILE)
+        with open(deltas, 'a') as f:
+            f.write(json.dumps({'time': time(), 'changes': [c.dict() for c in changes]}) + '\n')
+        self._delta_counts[profile_id] += 1
+
+        base = path.joinpath(SNAPSHOT_FILE)
+        if (
+            self._delta_counts[profile_id] >= self.compact_every
+            or not base.exists()
+            or deltas.stat().st_size > base.stat().st_size
+        ):
+            self._compact(profile_id)
+
+    def _update(self, profile_id: str, items: t.Dict[str, t.Dict]) -> t.List[ItemChange]:
+        snapshot = self._load(profile_id)
+        if not (changes := diff_snapshots(snapshot, items)):
+            return changes
+        apply_changes(snapshot, changes)
+        self._append(profile_id, changes)
+        return changes
+
+    def snapshot(self, profile_id: str) -> t.Dict[str, t.Dict]:
+        """
+        Returns the latest snapshot of a profile, empty if none was
+        ever stored.
+        """
+        return dict(self._load(str(profile_id)))
+
+    async def update(self, profile: D2Profile, profile_id: t.Optional[str] = None) -> t.List[ItemChange]:
+        """
+        Compares `profile` with its previous snapshot and stores only
+        the changes. The first snapshot of a profile is stored whole
+        and reported as every item being added.
+
+        :param profile_id: Key the snapshots are stored under, defaults
+            to the membership ID of the profile.
+        :type profile_id: str
+        :return: Changes since the previous snapshot.
+        :rtype: list
+
+        """
+        if profile_id is None:
+            profile_id = profile.profile.data.user_info.membership_id
+        profile_id = str(profile_id)
+        items = snapshot_items(profile)
+
+        lock = self._locks.setdefault(profile_id, asyncio.Lock())
+        async with lock:
+            return await asyncio.to_thread(self._update, profile_id, items)
+
+    def history(self, profile_id: str) -> t.Iterator[t.Tuple[float, t.List[ItemChange]]]:
+        """
+        Yields the time and changes of every update stored since the
+        last compaction, oldest first.
+        """
+        return self._read_deltas(self.path_for(str(profile_id)))
+
+    def compact(self, profile_id: str) -> None:
+        """
+        Folds the stored changes of a profile into its base snapshot.
+        """
+        self._compact(str(profile_id))
@@ -0,0 +1,68 @@
+import asyncio
+import logging
+import typing as t
+from pathlib import Path
+from time import time
+
+from models import *
+from .client import ApiClient
+from .common import *
+from .get import get_historical_stats_definition
+
+
+logger = logging.getLogger()
+
+
+__all__ = ('load_stats_catalog', 'STATS_CATALOG_MAX_AGE')
+
+
+"""
+Seconds a stats catalog cached on disk is used before the
+definitions are requested again.
+"""
+STATS_CATALOG_MAX_AGE = 24 * 60 * 60
+
+STATS_RESOURCE = 'd2_statistics_info.json'
+
+
+async def load_stats_catalog(
+    client: t.Optional[ApiClient] = None,
+    cache_path: t.Union[str, Path, None] = None,
+    max_age: float = STATS_CATALOG_MAX_AGE,
+    bundled: bool = False
+    ) -> StatsCatalog:
+    """
+    Loads the indexed :class:`~.models.StatsCatalog` of the historical
+    stat definitions.
+
+    A catalog cached at `cache_path` that is younger than `max_age`
+    seconds is used as is. Otherwise the definitions are requested from
+    the API, falling back to the snapshot bundled in `resources/` if
+    the request fails, and written to `cache_path`.
+
+    :param cache_path: File the catalog is cached in, its suffixes
+        select the format, e.g. `stats.json.gz`.
+    :type cache_path: str or Path
+    :param bundled: Load the bundled snapshot without a request.
+    :type bundled: bool
+
+    """
+    if cache_path is not None:
+        cache_path = Path(cache_path)
+        if cache_path.exists() and time() - cache_path.stat().st_mtime < max_age:
+            return await asyncio.to_thread(StatsCatalog.from_file, cache_path)
+
+    catalog = None
+    if not bundled:
+        definitions = await get_historical_stats_definition(client=client)
+        if definitions is not None and definitions.response:
+            catalog = StatsCatalog.from_response(definitions.response)
+        else:
+            logger.warning('Could not retrieve the stat definitions, using the bundled snapshot')
+    if catalog is None:
+        catalog = await asyncio.to_thread(StatsCatalog.from_file, RESOURCES.joinpath(STATS_RESOURCE))
+
+    if cache_path is not None:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        await asyncio.to_thread(catalog.to_file, cache_path)
+    return catalog
@@ -0,0 +1,238 @@
+import json
+import logging
+import re
+import typing as t
+from urllib.parse import urlencode
+
+from models import *
+from .client import ApiClient, get_default_client
+from .common import *
+from .factory import url_builder
+
+
+logger = logging.getLogger()
+
+
+__all__ = ('StreamRecord', 'JsonRecordScanner', 'PROFILE_RECORD_PATHS', 'stream_records',
+           'stream_profile_records')
+
+
+"""
+Locations of the per-item records of a `GetProfile` response and the
+kind of record found there. `*` matches any object key and `#` any
+array index. Both the layout returned by the API and the flattened
+layout of :class:`~.models.D2Profile` are covered.
+"""
+PROFILE_RECORD_PATHS = {
+    ('Response', 'profileInventory', 'data', 'items', '#'): 'item',
+    ('Response', 'characterInventories', 'data', '*', 'items', '#'): 'item',
+    ('Response', 'characterEquipment', 'data', '*', 'items', '#'): 'item',
+    ('Response', 'itemComponents', 'sockets', 'data', '*', 'sockets', '#'): 'socket',
+    ('Response', 'itemComponents', 'reusablePlugs', 'data', '*', 'plugs', '*', '#'): 'plug',
+    ('Response', 'profileInventory', '#'): 'item',
+    ('Response', 'inventory', '#', 'inventory', '#'): 'item',
+    ('Response', 'equipment', '#', 'equipment', '#'): 'item',
+    ('Response', 'itemComponents', 'sockets', '#'): 'socket',
+    ('Response', 'itemComponents', 'reusablePlugs', '#'): 'plug',
+}
+
+# A string complete within the chunk is matched whole, otherwise only its opening quote
+STRUCTURAL = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*"|[{}\[\]",:]')
+# Separators do not matter inside a record that is being buffered
+CAPTURE_STRUCTURAL = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*"|[{}\[\]"]')
+STRING_SPECIAL = re.compile(rb'["\\]')
+
+
+class StreamRecord(t.NamedTuple):
+    kind: str
+    path: t.Tuple[t.Union[str, int], ...]
+    data: t.Dict
+
+
+def _matches(pattern: t.Tuple[str, ...], path: t.Tuple[t.Union[str, int], ...]) -> bool:
+    if len(pattern) != len(path):
+        return False
+    for expected, actual in zip(pattern, path):
+        if expected == '#':
+            if not isinstance(actual, int):
+                return False
+        elif expected == '*':
+            if not isinstance(actual, str):
+                return False
+        elif expected != actual:
+            return False
+    return True
+
+
+class JsonRecordScanner:
+    """
+    Incremental JSON scanner that picks records out of a document fed
+    to it in arbitrary chunks.
+
+    Only the keys of the containers leading to a record are tracked,
+    every other value is skipped without being decoded. A container
+    whose location matches one of `paths` is buffered until it closes
+    and decoded on its own, so memory is bounded by the largest single
+    record rather than the whole document.
+
+    :param paths: Record kind by location pattern, see
+        :data:`PROFILE_RECORD_PATHS`.
+    :type paths: dict
+
+    """
+
+    def __init__(self, paths: t.Dict[t.Tuple[str, ...], str] = PROFILE_RECORD_PATHS) -> None:
+        self.paths = paths
+        self._lengths = {len(p) for p in paths}
+        # Each frame is [is_object, key or index, expecting_key]
+        self._frames: t.List[t.List] = []
+        self._in_string = False
+        self._escape = False
+        self._key: t.Optional[bytearray] = None
+        self._capture: t.Optional[bytearray] = None
+        self._capture_kind: t.Optional[str] = None
+        self._capture_path: t.Tuple = ()
+        self._capture_depth = 0
+
+    def _path(self) -> t.Tuple[t.Union[str, int], ...]:
+        return tuple(frame[1] for frame in self._frames)
+
+    def _select(self, path: t.Tuple) -> t.Optional[str]:
+        if len(path) not in self._lengths:
+            return None
+        for pattern, kind in self.paths.items():
+            if _matches(pattern, path):
+                return kind
+        return None
+
+    def feed(self, chunk: bytes) -> t.List[StreamRecord]:
+        """
+        Scans the next chunk of the document.
+
+        :return: Records completed within this chunk.
+        :rtype: list
+
+        """
+        records = []
+        frames = self._frames
+        capture_start = 0 if self._capture is not None else None
+        i, n = 0, len(chunk)
+
+        while i < n:
+            if self._in_string:
+                if self._escape:
+                    if self._key is not None:
+                        self._key += chunk[i:i + 1]
+                    self._escape = False
+                    i += 1
+                    continue
+
+                match = STRING_SPECIAL.search(chunk, i)
+                if match is None:
+                    if self._key is not None:
+                        self._key += chunk[i:]
+                    break
+
+                j = match.start()
+                if self._key is not None:
+                    self._key += chunk[i:j + 1] if chunk[j] == 0x5c else chunk[i:j]
+                if chunk[j] == 0x5c:
+                    self._escape = True
+                else:
+                    self._in_string = False
+                    if self._key is not None:
+                        frames[-1][1] = json.loads(b'"' + bytes(self._key) + b'"')
+                        self._key = None
+                i = j + 1
+                continue
+
+            match = (STRUCTURAL if self._capture is None else CAPTURE_STRUCTURAL).search(chunk, i)
+            if match is None:
+                break
+
+            j = match.start()
+            char = chunk[j]
+            i = match.end()
+
+            if char == 0x22 and i - j > 1:  # complete string
+                if self._capture is None and frames and frames[-1][0] and frames[-1][2]:
+                    frames[-1][1] = json.loads(match.group())
+            elif char == 0x22:  # "
+                self._in_string = True
+                if self._capture is None and frames and frames[-1][0] and frames[-1][2]:
+                    self._key = bytearray()
+            elif char in (0x7b, 0x5b):  # { [
+                if self._capture is not None:
+                    self._capture_depth += 1
+                    continue
+                path = self._path()
+                if (kind := self._select(path)) is not None:
+                    self._capture = bytearray()
+                    self._capture_kind = kind
+                    self._capture_path = path
+                    self._capture_depth = 1
+                    capture_start = j
+                    continue
+                frames.append([char == 0x7b, None if char == 0x7b else 0, char == 0x7b])
+            elif char in (0x7d, 0x5d):  # } ]
+                if self._capture is not None:
+                    self._capture_depth -= 1
+                    if self._capture_depth == 0:
+                        self._capture += chunk[capture_start:i]
+                        records.append(StreamRecord(
+                            self._capture_kind, self._capture_path, json.loads(bytes(self._capture))
+                        ))
+                        self._capture = None
+                        capture_start = None
+                    continue
+                frames.pop()
+            elif self._capture is not None:
+                continue
+            elif char == 0x3a:  # :
+                frames[-1][2] = False
+            elif char == 0x2c:  # ,
+                if frames[-1][0]:
+                    frames[-1][2] = True
+                else:
+                    frames[-1][1] += 1
+
+        if self._capture is not None:
+            self._capture += chunk[capture_start:]
+        return records
+
+
+async def stream_records(
+    url: str,
+    paths: t.Dict[t.Tuple[str, ...], str] = PROFILE_RECORD_PATHS,
+    client: t.Optional[ApiClient] = None
+    ) -> t.AsyncIterator[StreamRecord]:
+    """
+    Yields the records of the response of `url` selected by `paths`
+    as the body is received, without building the whole document.
+    """
+    if client is None:
+        client = get_default_client()
+
+    scanner = JsonRecordScanner(paths)
+    async for chunk in client.stream(url):
+        for record in scanner.feed(chunk):
+            yield record
+
+
+async def stream_profile_records(
+    profile: UserProfile,
+    components: t.List[int] = DEFAULT_COMPONENTS,
+    client: t.Optional[ApiClient] = None
+    ) -> t.AsyncIterator[StreamRecord]:
+    """
+    Streams the inventory items, sockets and plugs of one profile as
+    :class:`StreamRecord` objects while the `GetProfile` response is
+    downloaded. The path of a record holds the character or item
+    instance ID it belongs to where the response is keyed by them.
+    """
+    components_query = urlencode({'components': ','.join([str(c) for c in components])})
+    component_url = url_builder(
+        'd2', str(profile.membership_type), 'Profile', profile.membership_id, f'?{components_query}'
+    )
+    async for record in stream_records(component_url, PROFILE_RECORD_PATHS, client):
+        yield record
@@ -0,0 +1,135 @@
+import asyncio
+import logging
+import random
+import typing as t
+from time import monotonic
+
+
+logger = logging.getLogger()
+
+
+__all__ = ('RateLimiter', 'THROTTLE_ERROR_CODES', 'RETRY_STATUSES')
+
+
+"""
+Bungie `PlatformErrorCodes` returned when a request was rejected
+because a throttle limit was exceeded.
+https://bungie-net.github.io/#/components/schemas/Exceptions.PlatformErrorCodes
+"""
+THROTTLE_ERROR_CODES = frozenset({
+    36,  # ThrottleLimitExceeded
+    37,  # ThrottleLimitExceededMinutes
+    38,  # ThrottleLimitExceededMomentarily
+    39,  # ThrottleLimitExceededSeconds
+    51,  # PerApplicationThrottleExceeded
+    52,  # PerApplicationAnonymousThrottleExceeded
+    53,  # PerApplicationAuthenticatedThrottleExceeded
+    54,  # PerUserThrottleExceeded
+})
+
+"""
+HTTP statuses that are retried after backing off.
+"""
+RETRY_STATUSES = frozenset({429, 503})
+
+
+class RateLimiter:
+    """
+    Token bucket shared by every request made through an
+    :class:`~.client.ApiClient`. Requests are released at no more than
+    `rate` per second with bursts of up to `burst` requests.
+
+    When the server reports a throttle, through `ThrottleSeconds`, a
+    throttle error code or an HTTP 429/503, :meth:`throttle` blocks
+    the whole bucket for the reported duration so no other request is
+    sent in the meantime.
+
+    :param rate: Requests released per second.
+    :type rate: float
+    :param burst: Size of the bucket, defaults to `rate`.
+    :type burst: float
+    :param max_retries: Retries attempted for a throttled request.
+    :type max_retries: int
+    :param backoff_base: Base delay in seconds of the exponential backoff.
+    :type backoff_base: float
+    :param backoff_max: Upper bound in seconds of a single backoff.
+    :type backoff_max: float
+
+    """
+
+    def __init__(
+        self,
+        rate: float = 20.0,
+        burst: t.Optional[float] = None,
+        max_retries: int = 5,
+        backoff_base: float = 0.5,
+        backoff_max: float = 30.0
+        ) -> None:
+
+        self.rate = rate
+        self.capacity = rate if burst is None else burst
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        self._tokens = self.capacity
+        self._updated = monotonic()
+        self._blocked_until = 0.0
+        self._lock = asyncio.Lock()
+
+        self.throttle_events = 0
+        self.retries = 0
+        self.throttled_seconds = 0.0
+        self.waited_seconds = 0.0
+
+    async def acquire(self) -> None:
+        """
+        Waits until the bucket is not blocked by a server throttle and
+        a token is available, then takes it.
+        """
+        async with self._lock:
+            while True:
+                now = monotonic()
+                if now < self._blocked_until:
+                    wait = self._blocked_until - now
+                    self.throttled_seconds += wait
+                    await asyncio.sleep(wait)
+                    continue
+
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+
+                wait = (1 - self._tokens) / self.rate
+                self.waited_seconds += wait
+                await asyncio.sleep(wait)
+
+    def throttle(self, seconds: float) -> None:
+        """
+        Blocks the bucket for `seconds`, extending any block already
+        in place.
+        """
+        if seconds <= 0:
+            return
+        self.throttle_events += 1
+        self._blocked_until = max(self._blocked_until, monotonic() + seconds)
+        self._tokens = 0
+        logger.warning(f'Throttled by the API, backing off for {seconds:.2f}s')
+
+    def backoff(self, attempt: int) -> float:
+        """
+        Returns a jittered exponential backoff delay for the given
+        retry attempt.
+        """
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    @property
+    def stats(self) -> t.Dict[str, float]:
+        return {
+            'throttle_events': self.throttle_events,
+            'retries': self.retries,
+            'throttled_seconds': self.throttled_seconds,
+            'waited_seconds': self.waited_seconds,
+        }
@@ -1,4 +1,18 @@
 from .api import *
 from .generic import *
 from .inventory import *
-from .user import *
\ No newline at end of file
+from .serialization import *
+from .stats import *
+from .user import *
+
+from .generic import lazy_attributes
+
+
+# Submodules with heavy dependencies, imported on first access
+_LAZY_NAMES = {
+    'CompactItems': 'compact',
+    'ItemView': 'compact',
+    'compact_profile_items': 'compact',
+}
+
+__getattr__ = lazy_attributes(__name__, _LAZY_NAMES)
@@ -7,7 +7,7 @@ from ..generic import *
 __all__ = ('RefreshTokenResponse', 'UserApiResponse', 'UserProfile',
            'BungieMembership', 'ErrorProfile', 'PlatformMembership', 
            'UserResponse', 'AuthResponse', 'ScopedResponse',
-           'ScopedApiRespone')
+           'ScopedApiRespone', 'ClanMember')
 
 
 class RefreshTokenResponse(BaseModel):
@@ -86,6 +86,16 @@ class PlatformMembership(BaseModel):
     profilesWithErrors: t.Optional[t.List[ErrorProfile]]
 
 
+class ClanMember(BaseModel):
+    memberType: t.Optional[int]
+    isOnline: t.Optional[bool]
+    lastOnlineStatusChange: t.Optional[str]
+    groupId: t.Optional[str]
+    destinyUserInfo: UserProfile
+    bungieNetUserInfo: t.Optional[BungieMembership]
+    joinDate: t.Optional[datetime]
+
+
 UserResponse = t.TypeVar('UserResponse', UserApiResponse, UserProfile, BungieMembership, ErrorProfile, PlatformMembership)
 AuthResponse = t.TypeVar('AuthResponse', bound=RefreshTokenResponse)
 ScopedResponse: t.TypeAlias = t.Union[UserResponse, AuthResponse]
@@ -0,0 +1,174 @@
+import typing as t
+import numpy as np
+
+from models.generic import camel_to_snake
+from models.inventory import *
+
+
+__all__ = ('CompactItems', 'ItemView', 'compact_profile_items')
+
+
+"""
+Fields of :class:`~.inventory.InventoryItem` and :class:`~.inventory.D2Currency`
+kept by :class:`CompactItems`, with the array type of each column.
+`itemInstanceId` is 0 for items without an instance.
+"""
+ITEM_FIELDS = {
+    'itemHash': np.uint32,
+    'itemInstanceId': np.uint64,
+    'bucketHash': np.uint32,
+    'location': np.int8,
+    'quantity': np.int32,
+    'state': np.int32,
+    'bindStatus': np.int8,
+    'transferStatus': np.int8,
+    'dismantlePermission': np.int8,
+    'versionNumber': np.int32,
+    'isWrapper': np.bool_,
+    'lockable': np.bool_,
+}
+
+SNAKE_FIELDS = {camel_to_snake(name): name for name in ITEM_FIELDS}
+
+
+class ItemView:
+    """
+    Lightweight read-only view of one row of a :class:`CompactItems`.
+    Fields are read with the same snake_case names as on the models.
+    """
+
+    __slots__ = ('_items', '_index')
+
+    def __init__(self, items: 'CompactItems', index: int) -> None:
+        self._items = items
+        self._index = index
+
+    def __getattr__(self, name: str) -> t.Any:
+        if (field_name := SNAKE_FIELDS.get(name, name)) not in ITEM_FIELDS:
+            raise AttributeError(f'Item has no field {name}')
+        return self._items.columns[field_name][self._index].item()
+
+    def __repr__(self) -> str:
+        return f'ItemView(item_hash={self.item_hash}, item_instance_id={self.item_instance_id})'
+
+    def dict(self) -> t.Dict[str, t.Any]:
+        return {name: self._items.columns[name][self._index].item() for name in ITEM_FIELDS}
+
+
+class CompactItems:
+    """
+    Columnar container for a list of inventory items. Each field of
+    :data:`ITEM_FIELDS` is stored in one typed NumPy array instead of a
+    model instance per item, which takes a fraction of the memory and
+    allows vectorized filtering such as
+    `items.columns['bucketHash'] == bucket_hash`.
+
+    Rows are handed out as :class:`ItemView` objects on demand. Fields
+    outside :data:`ITEM_FIELDS`, e.g. `tooltipNotificationIndexes`, are
+    not kept.
+
+    :param columns: Array of every field in :data:`ITEM_FIELDS`, all of
+        the same length.
+    :type columns: dict
+
+    """
+
+    __slots__ = ('columns',)
+
+    def __init__(self, columns: t.Dict[str, np.ndarray]) -> None:
+        self.columns = columns
+
+    @classmethod
+    def from_raw(cls, items: t.Iterable[t.Dict]) -> 'CompactItems':
+        """
+        Builds the container straight from raw API item dicts without
+        creating a model per item.
+        """
+        values = {name: [] for name in ITEM_FIELDS}
+        for item in items:
+            for name, column in values.items():
+                column.append(int(item.get(name) or 0))
+        return cls({
+            name: np.array(column, dtype=ITEM_FIELDS[name]) if column else np.empty(0, ITEM_FIELDS[name])
+            for name, column in values.items()
+        })
+
+    @classmethod
+    def from_models(cls, items: t.Iterable[t.Union[InventoryItem, D2Currency]]) -> 'CompactItems':
+        return cls.from_raw(
+            {name: getattr(item, snake, None) for snake, name in SNAKE_FIELDS.items()} for item in items
+        )
+
+    @classmethod
+    def concat(cls, item_lists: t.Iterable['CompactItems']) -> 'CompactItems':
+        item_lists = list(item_lists)
+        if not item_lists:
+            return cls.from_raw([])
+        return cls({name: np.concatenate([i.columns[name] for i in item_lists]) for name in ITEM_FIELDS})
+
+    def __len__(self) -> int:
+        return len(self.columns['itemHash'])
+
+    def __getitem__(self, index: t.Union[int, slice]) -> t.Union[ItemView, 'CompactItems']:
+        if isinstance(index, slice):
+            return CompactItems({name: column[index] for name, column in self.columns.items()})
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('Item index out of range')
+        return ItemView(self, index)
+
+    def __iter__(self) -> t.Iterator[ItemView]:
+        return (ItemView(self, i) for i in range(len(self)))
+
+    @property
+    def nbytes(self) -> int:
+        return sum(column.nbytes for column in self.columns.values())
+
+    def filter(self, mask: np.ndarray) -> 'CompactItems':
+        """
+        Returns the rows selected by a boolean mask over the columns.
+        """
+        return CompactItems({name: column[mask] for name, column in self.columns.items()})
+
+    def to_models(self, model: t.Type[t.Union[InventoryItem, D2Currency]] = InventoryItem) -> t.List:
+        """
+        Rebuilds a model per row. Hashes and instance IDs are converted
+        back to strings where `model` declares them as strings.
+        """
+        columns = {name: column.tolist() for name, column in self.columns.items()}
+        string_fields = {
+            name for name, field in model.__fields__.items()
+            if name in ITEM_FIELDS and field.outer_type_ is str
+        }
+
+        models = []
+        for i in range(len(self)):
+            data = {}
+            for name in ITEM_FIELDS:
+                if name not in model.__fields__:
+                    continue
+                value = columns[name][i]
+                data[name] = str(value) if name in string_fields else value
+            models.append(model.parse_obj(data))
+        return models
+
+
+def compact_profile_items(profile: D2Profile) -> t.Dict[str, t.Union[CompactItems, t.Dict[str, CompactItems]]]:
+    """
+    Converts the item lists of a profile into :class:`CompactItems`.
+
+    :return: `profileInventory` as one container, `inventory` and
+        `equipment` as one container per character ID.
+    :rtype: dict
+
+    """
+    return {
+        'profileInventory': CompactItems.from_models(profile.profile_inventory or []),
+        'inventory': {
+            c.character_id: CompactItems.from_models(c.inventory or []) for c in profile.inventory or []
+        },
+        'equipment': {
+            c.character_id: CompactItems.from_models(c.equipment or []) for c in profile.equipment or []
+        },
+    }
@@ -1,31 +1,57 @@
+import asyncio
 import re
 import typing as t
-from pydantic import BaseModel as PydanticBase, root_validator
+from functools import lru_cache
+from pathlib import Path
+from pydantic import BaseModel as PydanticBase, ValidationError, root_validator
+from pydantic.fields import SHAPE_SINGLETON, MAPPING_LIKE_SHAPES
 
+from models.serialization import file_format, read_file, write_file
 
-__all__ = ('AdvancedModel', 'BaseModel')
+
+__all__ = ('AdvancedModel', 'BaseModel', 'LazyModel', 'restore_fields')
 
 
 pattern = re.compile(r'(?<!^)(?=[A-Z])')
 
+"""
+camelCase to snake_case conversions of every declared model field,
+filled in when a model class is created so validating a response
+only does dictionary lookups.
+"""
+snake_keys: t.Dict[str, str] = {}
 
-def camel_to_snake(camel: str) -> str:
+
+@lru_cache(maxsize=4096)
+def _extra_to_snake(camel: str) -> str:
     return pattern.sub('_', camel).lower()
 
 
+def camel_to_snake(camel: str) -> str:
+    if (snake := snake_keys.get(camel)) is not None:
+        return snake
+    # Undeclared extra keys are converted through a bounded cache
+    return _extra_to_snake(camel)
+
+
 class BaseModel(PydanticBase):
     class Config:
         arbitrary_types_allowed = True
         allow_mutation = True
         extra = 'allow'
+
+    def __init_subclass__(cls, **kwargs) -> None:
+        super().__init_subclass__(**kwargs)
+        for field_name in cls.__fields__:
+            snake_keys[field_name] = _extra_to_snake(field_name)
     
     @root_validator
     def conver_cases(cls, values: t.Dict) -> t.Dict:
-        updated_values = {}
-
-        for attr_name, attr_value in values.items():
-            updated_values[camel_to_snake(attr_name)] = attr_value
-        return updated_values
+        keys = snake_keys
+        return {
+            keys[attr_name] if attr_name in keys else camel_to_snake(attr_name): attr_value
+            for attr_name, attr_value in values.items()
+        }
 
     
     def __str__(self):
@@ -33,11 +59,164 @@ class BaseModel(PydanticBase):
 
 class AdvancedModel(BaseModel):
     
-    def to_file(self, file_name: t.Optional[str] = None) -> str:
+    def to_file(self, file_name: t.Union[str, Path, None] = None) -> str:
+        """
+        Writes the model to `file_name`, as JSON unless its suffixes
+        select another format, see :func:`~.serialization.file_format`.
+        """
         if file_name is None:
             file_name = f'{self}.json'
-        
-        with open(file_name, 'w') as json_file:
-            json_file.write(self.json())
-        
-        return file_name
\ No newline at end of file
+
+        if file_format(file_name) == ('.json', None):
+            with open(file_name, 'w') as json_file:
+                json_file.write(self.json())
+        else:
+            write_file(file_name, self.dict())
+
+        return file_name
+
+    async def to_file_async(self, file_name: t.Union[str, Path, None] = None) -> str:
+        """
+        :meth:`to_file` run in a worker thread, so encoding and writing
+        a large model does not block the event loop.
+        """
+        return await asyncio.to_thread(self.to_file, file_name)
+
+    @classmethod
+    def from_file(cls, file_name: t.Union[str, Path]) -> 'AdvancedModel':
+        """
+        Rebuilds a model written by :meth:`to_file` in any format.
+        """
+        return cls.parse_obj(restore_fields(cls, read_file(file_name)))
+
+    @classmethod
+    async def from_file_async(cls, file_name: t.Union[str, Path]) -> 'AdvancedModel':
+        return await asyncio.to_thread(cls.from_file, file_name)
+
+
+@lru_cache(maxsize=None)
+def _attribute_fields(model: t.Type[PydanticBase]) -> t.Dict[str, str]:
+    fields = {camel_to_snake(name): name for name in model.__fields__}
+    fields.update({name: name for name in model.__fields__})
+    return fields
+
+
+@lru_cache(maxsize=None)
+def _serialized_fields(model: t.Type[PydanticBase]) -> t.Dict[str, str]:
+    # Converted keys of fields colliding on one snake_case name keep the
+    # value of the last declared field, so that field is restored
+    return {camel_to_snake(name): name for name in model.__fields__}
+
+
+def _restore_value(field: t.Any, value: t.Any) -> t.Any:
+    if field.shape == SHAPE_SINGLETON:
+        return restore_fields(field.type_, value)
+    if field.shape in MAPPING_LIKE_SHAPES:
+        return {k: restore_fields(field.type_, v) for k, v in value.items()}
+    return [restore_fields(field.type_, v) for v in value]
+
+
+def restore_fields(model: t.Type[PydanticBase], data: t.Any) -> t.Any:
+    """
+    Maps the snake_case keys of serialized `model` data back to the
+    declared field names, recursing into nested models, so the data
+    can be validated again.
+    """
+    if not isinstance(data, dict):
+        return data
+
+    fields = _serialized_fields(model)
+    restored = {}
+    for key, value in data.items():
+        name = fields.get(key, key)
+        field = model.__fields__.get(name)
+        if (
+            value is not None
+            and field is not None
+            and isinstance(field.type_, type)
+            and issubclass(field.type_, PydanticBase)
+        ):
+            value = _restore_value(field, value)
+        restored[name] = value
+    return restored
+
+
+class LazyModel:
+    """
+    Holds the raw data of a `model` response and validates each
+    top-level field only when it is first accessed, so callers that
+    touch one section of a large response do not pay to build every
+    nested model in it. Fields are read with the same snake_case
+    names as on the validated model.
+
+    :param model: Model the data is validated against.
+    :param data: Raw response data.
+    :type data: dict
+
+    """
+
+    __slots__ = ('_model', '_data', '_values')
+
+    def __init__(self, model: t.Type[BaseModel], data: t.Dict) -> None:
+        self._model = model
+        self._data = data
+        self._values: t.Dict[str, t.Any] = {}
+
+    def __getattr__(self, name: str) -> t.Any:
+        if (field_name := _attribute_fields(self._model).get(name)) is None:
+            raise AttributeError(f'{self._model.__name__} has no field {name}')
+
+        if field_name in self._values:
+            return self._values[field_name]
+
+        field = self._model.__fields__[field_name]
+        value, errors = field.validate(self._data.get(field.alias), {}, loc=field.alias, cls=self._model)
+        if errors:
+            raise ValidationError([errors], self._model)
+
+        self._values[field_name] = value
+        return value
+
+    def __str__(self) -> str:
+        return f'lazy_{pattern.sub("_", self._model.__name__).lower()}'
+
+    def __repr__(self) -> str:
+        return f'LazyModel({self._model.__name__})'
+
+    def validate(self) -> BaseModel:
+        """
+        Validates the whole response into `model`.
+        """
+        return self._model.parse_obj(self._data)
+
+    def dict(self, **kwargs) -> t.Dict:
+        return self.validate().dict(**kwargs)
+
+    def json(self, **kwargs) -> str:
+        return self.validate().json(**kwargs)
+
+
+def lazy_attributes(package: str, names: t.Dict[str, str]) -> t.Callable[[str], t.Any]:
+    """
+    Builds the module level `__getattr__` of `package` that imports the
+    submodule `names` maps an attribute to on first access, for
+    submodules with heavy dependencies. The imported value is stored
+    on the package so later accesses skip the hook. Lazy names are not
+    part of the star import of the package.
+
+    :param package: `__name__` of the package.
+    :type package: str
+    :param names: Submodule holding each lazily imported attribute.
+    :type names: dict
+
+    """
+    def __getattr__(name: str) -> t.Any:
+        if (module_name := names.get(name)) is None:
+            raise AttributeError(f'module {package!r} has no attribute {name!r}')
+        import sys
+        from importlib import import_module
+        value = getattr(import_module(f'.{module_name}', package), name)
+        setattr(sys.modules[package], name, value)
+        return value
+
+    return __getattr__
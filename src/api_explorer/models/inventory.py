@@ -230,4 +230,22 @@ class D2Profile(AdvancedModel):
     itemComponents: t.Optional[ItemComponents]
     profileCurrencies: t.Optional[D2Currency]
     profileInventory: t.Optional[t.List[InventoryItem]]
-    profilePlugSets: t.Optional[t.List[ItemPlug]]
\ No newline at end of file
+    profilePlugSets: t.Optional[t.List[ItemPlug]]
+
+    def iter_items(self) -> t.Iterator[t.Tuple[str, str, t.Union[InventoryItem, D2Currency]]]:
+        """
+        Yields every item held by the profile as a tuple of the owner,
+        either `profile` or a character ID, the section it was found in
+        and the item itself.
+        """
+        # Sections may be missing from a partial profile, see `~.planner`
+        for item in getattr(self, 'profile_inventory', None) or []:
+            yield 'profile', 'profileInventory', item
+        if (currencies := getattr(self, 'profile_currencies', None)) is not None:
+            yield 'profile', 'profileCurrencies', currencies
+        for character in getattr(self, 'inventory', None) or []:
+            for item in character.inventory or []:
+                yield character.character_id, 'inventory', item
+        for character in getattr(self, 'equipment', None) or []:
+            for item in character.equipment or []:
+                yield character.character_id, 'equipment', item
\ No newline at end of file
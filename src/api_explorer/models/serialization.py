@@ -0,0 +1,85 @@
+import gzip
+import json
+import typing as t
+from pathlib import Path
+from pydantic.json import pydantic_encoder
+
+
+__all__ = ('dumps', 'loads', 'read_file', 'write_file', 'file_format')
+
+
+"""
+Encodings and compressions selected by the suffixes of a file name,
+e.g. `inventory.json`, `inventory.json.gz` or `inventory.msgpack.zst`.
+`.msgpack` needs the optional `msgpack` package and `.zst` the
+optional `zstandard` package.
+"""
+ENCODINGS = ('.json', '.msgpack')
+COMPRESSIONS = ('.gz', '.zst')
+
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+
+
+def _optional(module_name: str, suffix: str) -> t.Any:
+    from importlib import import_module
+    try:
+        return import_module(module_name)
+    except ImportError as e:
+        raise ImportError(f'The {module_name} package is required for {suffix} files') from e
+
+
+def file_format(file_name: t.Union[str, Path]) -> t.Tuple[str, t.Optional[str]]:
+    """
+    Returns the encoding and compression of `file_name`. Unknown
+    suffixes are written as uncompressed JSON.
+    """
+    suffixes = Path(file_name).suffixes
+    compression = suffixes.pop() if suffixes and suffixes[-1] in COMPRESSIONS else None
+    encoding = suffixes[-1] if suffixes and suffixes[-1] in ENCODINGS else '.json'
+    return encoding, compression
+
+
+def dumps(data: t.Any, file_name: t.Union[str, Path]) -> bytes:
+    """
+    Encodes `data` in the format selected by `file_name`. Values JSON
+    does not support, such as enums and models, are converted as
+    :meth:`pydantic.BaseModel.json` does.
+    """
+    encoding, compression = file_format(file_name)
+
+    if encoding == '.msgpack':
+        raw = _optional('msgpack', encoding).packb(data, default=pydantic_encoder)
+    else:
+        raw = json.dumps(data, default=pydantic_encoder, separators=(',', ':')).encode()
+
+    match compression:
+        case '.gz':
+            return gzip.compress(raw, compresslevel=GZIP_LEVEL)
+        case '.zst':
+            return _optional('zstandard', compression).ZstdCompressor(level=ZSTD_LEVEL).compress(raw)
+    return raw
+
+
+def loads(raw: bytes, file_name: t.Union[str, Path]) -> t.Any:
+    encoding, compression = file_format(file_name)
+
+    match compression:
+        case '.gz':
+            raw = gzip.decompress(raw)
+        case '.zst':
+            raw = _optional('zstandard', compression).ZstdDecompressor().decompress(raw)
+
+    if encoding == '.msgpack':
+        return _optional('msgpack', encoding).unpackb(raw)
+    return json.loads(raw)
+
+
+def write_file(file_name: t.Union[str, Path], data: t.Any) -> None:
+    with open(file_name, 'wb') as f:
+        f.write(dumps(data, file_name))
+
+
+def read_file(file_name: t.Union[str, Path]) -> t.Any:
+    with open(file_name, 'rb') as f:
+        return loads(f.read(), file_name)
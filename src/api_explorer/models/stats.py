@@ -0,0 +1,161 @@
+import typing as t
+from pathlib import Path
+
+from models.generic import BaseModel, restore_fields
+from models.serialization import read_file, write_file
+
+
+__all__ = ('StatDefinition', 'StatsCatalog')
+
+
+class StatDefinition(BaseModel):
+    statId: str
+    group: int
+    periodTypes: t.List[int]
+    modes: t.List[int]
+    category: int
+    statName: t.Optional[str]
+    statNameAbbr: t.Optional[str]
+    statDescription: t.Optional[str]
+    unitType: t.Optional[int]
+    unitLabel: t.Optional[str]
+    weight: t.Optional[int]
+    iconImage: t.Optional[str]
+    medalTierHash: t.Optional[int]
+    medalTierIdentifier: t.Optional[str]
+    contentIconOverrideId: t.Optional[str]
+    bestActivityIdPropertyName: t.Optional[str]
+
+
+def _bits(bitset: int) -> t.Iterator[int]:
+    while bitset:
+        low = bitset & -bitset
+        yield low.bit_length() - 1
+        bitset ^= low
+
+
+class StatsCatalog:
+    """
+    Historical stat definitions with inverted indexes by mode, period
+    type, group and category.
+
+    Each index maps a value to a bitset, held in an `int`, of the
+    positions of the definitions it applies to, so a filter over any
+    combination of dimensions is a few integer `&` operations no matter
+    how many definitions there are.
+
+    :param definitions: Stat definitions in catalog order.
+    :type definitions: list
+
+    """
+
+    __slots__ = ('definitions', 'positions', 'modes', 'period_types', 'groups', 'categories')
+
+    def __init__(self, definitions: t.Iterable[StatDefinition]) -> None:
+        self.definitions: t.List[StatDefinition] = list(definitions)
+        self.positions: t.Dict[str, int] = {}
+        self.modes: t.Dict[int, int] = {}
+        self.period_types: t.Dict[int, int] = {}
+        self.groups: t.Dict[int, int] = {}
+        self.categories: t.Dict[int, int] = {}
+
+        for position, definition in enumerate(self.definitions):
+            bit = 1 << position
+            self.positions[definition.stat_id] = position
+            for mode in definition.modes:
+                self.modes[mode] = self.modes.get(mode, 0) | bit
+            for period_type in definition.period_types:
+                self.period_types[period_type] = self.period_types.get(period_type, 0) | bit
+            self.groups[definition.group] = self.groups.get(definition.group, 0) | bit
+            self.categories[definition.category] = self.categories.get(definition.category, 0) | bit
+
+    @classmethod
+    def from_response(cls, response: t.Dict[str, t.Dict]) -> 'StatsCatalog':
+        """
+        Builds the catalog from the `Response` of the historical stats
+        definition endpoint, a dict of raw definitions by stat ID.
+        """
+        return cls(StatDefinition.parse_obj(definition) for definition in response.values())
+
+    @classmethod
+    def from_file(cls, file_name: t.Union[str, Path]) -> 'StatsCatalog':
+        """
+        Loads a catalog written by :meth:`to_file`, or a raw response
+        such as `resources/d2_statistics_info.json`.
+        """
+        data = read_file(file_name)
+        if 'definitions' not in data:
+            return cls.from_response(data)
+        return cls(StatDefinition.parse_obj(restore_fields(StatDefinition, d)) for d in data['definitions'])
+
+    def to_file(self, file_name: t.Union[str, Path]) -> str:
+        """
+        Writes the definitions to `file_name` in the format selected by
+        its suffixes, see :func:`~.serialization.file_format`.
+        """
+        write_file(file_name, {'definitions': [d.dict() for d in self.definitions]})
+        return str(file_name)
+
+    def __len__(self) -> int:
+        return len(self.definitions)
+
+    def __iter__(self) -> t.Iterator[StatDefinition]:
+        return iter(self.definitions)
+
+    def __contains__(self, stat_id: str) -> bool:
+        return stat_id in self.positions
+
+    def __getitem__(self, stat_id: str) -> StatDefinition:
+        return self.definitions[self.positions[stat_id]]
+
+    def get(self, stat_id: str) -> t.Optional[StatDefinition]:
+        if (position := self.positions.get(stat_id)) is None:
+            return None
+        return self.definitions[position]
+
+    def select(
+        self,
+        mode: t.Optional[int] = None,
+        period_type: t.Optional[int] = None,
+        group: t.Optional[int] = None,
+        category: t.Optional[int] = None
+        ) -> int:
+        """
+        Returns the bitset of the definitions matching every given
+        dimension, for combining with other selections.
+        """
+        selected = (1 << len(self.definitions)) - 1
+        for index, value in (
+            (self.modes, mode),
+            (self.period_types, period_type),
+            (self.groups, group),
+            (self.categories, category),
+        ):
+            if value is not None:
+                selected &= index.get(int(value), 0)
+        return selected
+
+    def filter(
+        self,
+        mode: t.Optional[int] = None,
+        period_type: t.Optional[int] = None,
+        group: t.Optional[int] = None,
+        category: t.Optional[int] = None
+        ) -> t.List[StatDefinition]:
+        """
+        Returns the definitions matching every given dimension, e.g.
+        `catalog.filter(mode=46)` for the stats of mode 46.
+        """
+        return self.definitions_of(self.select(mode, period_type, group, category))
+
+    def count(
+        self,
+        mode: t.Optional[int] = None,
+        period_type: t.Optional[int] = None,
+        group: t.Optional[int] = None,
+        category: t.Optional[int] = None
+        ) -> int:
+        return self.select(mode, period_type, group, category).bit_count()
+
+    def definitions_of(self, bitset: int) -> t.List[StatDefinition]:
+        return [self.definitions[position] for position in _bits(bitset)]